@@ -5,12 +5,14 @@ Enhanced with comprehensive audit logging
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 import httpx
+import json
 import time
 import hashlib
 import uuid
 from loguru import logger
-from typing import Optional
+from typing import Optional, Tuple, List, Dict
 
 from ..models import ChatRequest, ChatResponse, ErrorResponse
 from ..config import settings
@@ -70,6 +72,173 @@ def log_chat_audit(
     except Exception as e:
         logger.error(f"Failed to log audit event: {e}")
 
+def prepare_conversation(
+    request: ChatRequest,
+    ip_address: str,
+    prompt_hash: str,
+    request_id: str
+) -> Tuple[List[Dict[str, str]], List[str], int]:
+    """
+    Retrieve RAG context and assemble the conversation sent to the LLM
+    Shared by the regular and streaming completion routes
+    
+    Returns:
+        Conversation messages, source filenames and the number of RAG documents used
+    """
+    # Get RAG context if requested
+    context = None
+    sources = []  # Always initialize as empty list
+    rag_documents_found = 0
+    
+    if request.use_rag and request.message:
+        logger.info(f"Retrieving RAG context for query: {request.message[:100]}...")
+        
+        # Log RAG query
+        log_chat_audit(
+            action_type="RAG_QUERY_INITIATED",
+            status="initiated",
+            details=f"Starting RAG document search for query hash: {prompt_hash}",
+            ip_address=ip_address,
+            content_hash=prompt_hash,
+            severity_level="INFO",
+            request_id=request_id,
+            resource="rag_service"
+        )
+        
+        # Debug: Log the selected document IDs  
+        logger.info(f"RAG Search - Selected document IDs: {request.selected_document_ids}")
+        
+        # Debug: Check RAG service state
+        try:
+            collection_count = rag_service.collection.count()
+            logger.info(f"RAG Service - Collection count before search: {collection_count}")
+            
+            # List documents in collection
+            docs_in_collection = rag_service.list_documents()
+            logger.info(f"RAG Service - Documents in collection: {len(docs_in_collection)}")
+            for doc in docs_in_collection:
+                logger.info(f"RAG Service - Doc: {doc['filename']} (ID: {doc['document_id']})")
+                
+        except Exception as e:
+            logger.error(f"RAG Service - Error checking collection state: {e}")
+        
+        context_results = rag_service.search_documents(
+            query=request.message,
+            n_results=5,
+            selected_document_ids=request.selected_document_ids
+        )
+        
+        # Debug: Log ALL search results before filtering
+        logger.info(f"RAG Search - Raw results returned: {len(context_results)} items")
+        for i, result in enumerate(context_results):
+            logger.info(f"Raw Result {i}: similarity={result.get('similarity', 'N/A')}, distance={result.get('distance', 'N/A')}, content='{result['content'][:50]}...'")
+        
+        # Filter by similarity threshold (very low for local TF-IDF embeddings)
+        filtered_results = [
+            result for result in context_results 
+            if result.get('similarity', 0.0) >= 0.001  # Very low threshold for TF-IDF
+        ]
+        
+        rag_documents_found = len(filtered_results)
+        
+        # Debug: Log filtered results
+        logger.info(f"RAG Search - Filtered results: {len(filtered_results)} documents")
+        for i, result in enumerate(filtered_results):
+            logger.info(f"RAG Result {i}: similarity={result.get('similarity', 0)}, content='{result['content'][:100]}...'")
+        
+        if filtered_results:
+            context = "\n\n".join([
+                f"[Source: {result['metadata'].get('filename', 'Unknown')}]\n{result['content']}"
+                for result in filtered_results
+            ])
+            sources = [result['metadata'].get('filename', 'Unknown') for result in filtered_results]
+            
+            # Debug: Log the formatted context
+            logger.info(f"RAG Context - Formatted context length: {len(context)} chars")
+            logger.info(f"RAG Context - Preview: {context[:200]}...")
+            
+            # Log successful RAG retrieval
+            log_chat_audit(
+                action_type="RAG_QUERY_SUCCESS",
+                status="success",
+                details=f"Found {len(filtered_results)} relevant documents. "
+                       f"Sources: {', '.join(sources)}",
+                ip_address=ip_address,
+                content_hash=prompt_hash,
+                severity_level="INFO",
+                request_id=request_id,
+                resource="rag_service"
+            )
+            
+            logger.info(f"Found {len(filtered_results)} relevant documents")
+        else:
+            # Log no relevant documents found
+            log_chat_audit(
+                action_type="RAG_QUERY_NO_RESULTS",
+                status="success",
+                details="No relevant documents found above similarity threshold (0.001)",
+                ip_address=ip_address,
+                content_hash=prompt_hash,
+                severity_level="INFO",
+                request_id=request_id,
+                resource="rag_service"
+            )
+            
+            logger.info("No relevant documents found in RAG search")
+    
+    # Prepare conversation messages with context
+    conversation_messages = []
+    
+    # Add conversation history if provided
+    if request.messages:
+        logger.info(f"Processing {len(request.messages)} conversation history messages")
+        for i, msg in enumerate(request.messages):
+            conversation_messages.append({
+                "role": msg.role,
+                "content": msg.content
+            })
+            logger.debug(f"History message {i}: {msg.role} - {msg.content[:50]}...")
+    else:
+        logger.info("No conversation history provided")
+    
+    # Prepare the current message with RAG context if available
+    current_message = request.message
+    if context:
+        current_message = f"""Based on the following legal documents and context, please answer the question:
+
+CONTEXT:
+{context}
+
+QUESTION: {request.message}
+
+Please provide a comprehensive answer based on the provided documents. If the documents don't contain relevant information, please indicate this clearly."""
+        
+        # Debug: Log the enhanced message
+        logger.info(f"RAG Enhanced Message - Length: {len(current_message)} chars")
+        logger.info(f"RAG Enhanced Message - Preview: {current_message[:300]}...")
+    else:
+        logger.info("RAG - No context found, sending original message only")
+    
+    # Add the current message to conversation
+    conversation_messages.append({
+        "role": "user",
+        "content": current_message
+    })
+    
+    # Log LLM API call initiation
+    log_chat_audit(
+        action_type="LLM_API_CALL_INITIATED",
+        status="initiated",
+        details=f"Sending request to LLM API. Conversation length: {len(conversation_messages)} messages, Current message length: {len(current_message)} chars",
+        ip_address=ip_address,
+        content_hash=hash_content(current_message),
+        severity_level="INFO",
+        request_id=request_id,
+        resource="llm_api"
+    )
+    
+    return conversation_messages, sources, rag_documents_found
+
 @router.post("/completions", response_model=ChatResponse)
 async def chat_completion(
     request: ChatRequest, 
@@ -108,156 +277,8 @@ async def chat_completion(
     )
     
     try:
-        # Get RAG context if requested
-        context = None
-        sources = []  # Always initialize as empty list
-        rag_documents_found = 0
-        
-        if request.use_rag and request.message:
-            logger.info(f"Retrieving RAG context for query: {request.message[:100]}...")
-            
-            # Log RAG query
-            log_chat_audit(
-                action_type="RAG_QUERY_INITIATED",
-                status="initiated",
-                details=f"Starting RAG document search for query hash: {prompt_hash}",
-                ip_address=ip_address,
-                content_hash=prompt_hash,
-                severity_level="INFO",
-                request_id=request_id,
-                resource="rag_service"
-            )
-            
-            # Debug: Log the selected document IDs  
-            logger.info(f"RAG Search - Selected document IDs: {request.selected_document_ids}")
-            
-            # Debug: Check RAG service state
-            try:
-                collection_count = rag_service.collection.count()
-                logger.info(f"RAG Service - Collection count before search: {collection_count}")
-                
-                # List documents in collection
-                docs_in_collection = rag_service.list_documents()
-                logger.info(f"RAG Service - Documents in collection: {len(docs_in_collection)}")
-                for doc in docs_in_collection:
-                    logger.info(f"RAG Service - Doc: {doc['filename']} (ID: {doc['document_id']})")
-                    
-            except Exception as e:
-                logger.error(f"RAG Service - Error checking collection state: {e}")
-            
-            context_results = rag_service.search_documents(
-                query=request.message,
-                n_results=5,
-                selected_document_ids=request.selected_document_ids
-            )
-            
-            # Debug: Log ALL search results before filtering
-            logger.info(f"RAG Search - Raw results returned: {len(context_results)} items")
-            for i, result in enumerate(context_results):
-                logger.info(f"Raw Result {i}: similarity={result.get('similarity', 'N/A')}, distance={result.get('distance', 'N/A')}, content='{result['content'][:50]}...'")
-            
-            # Filter by similarity threshold (very low for local TF-IDF embeddings)
-            filtered_results = [
-                result for result in context_results 
-                if result.get('similarity', 0.0) >= 0.001  # Very low threshold for TF-IDF
-            ]
-            
-            rag_documents_found = len(filtered_results)
-            
-            # Debug: Log filtered results
-            logger.info(f"RAG Search - Filtered results: {len(filtered_results)} documents")
-            for i, result in enumerate(filtered_results):
-                logger.info(f"RAG Result {i}: similarity={result.get('similarity', 0)}, content='{result['content'][:100]}...'")
-            
-            if filtered_results:
-                context = "\n\n".join([
-                    f"[Source: {result['metadata'].get('filename', 'Unknown')}]\n{result['content']}"
-                    for result in filtered_results
-                ])
-                sources = [result['metadata'].get('filename', 'Unknown') for result in filtered_results]
-                
-                # Debug: Log the formatted context
-                logger.info(f"RAG Context - Formatted context length: {len(context)} chars")
-                logger.info(f"RAG Context - Preview: {context[:200]}...")
-                
-                # Log successful RAG retrieval
-                log_chat_audit(
-                    action_type="RAG_QUERY_SUCCESS",
-                    status="success",
-                    details=f"Found {len(filtered_results)} relevant documents. "
-                           f"Sources: {', '.join(sources)}",
-                    ip_address=ip_address,
-                    content_hash=prompt_hash,
-                    severity_level="INFO",
-                    request_id=request_id,
-                    resource="rag_service"
-                )
-                
-                logger.info(f"Found {len(filtered_results)} relevant documents")
-            else:
-                # Log no relevant documents found
-                log_chat_audit(
-                    action_type="RAG_QUERY_NO_RESULTS",
-                    status="success",
-                    details="No relevant documents found above similarity threshold (0.001)",
-                    ip_address=ip_address,
-                    content_hash=prompt_hash,
-                    severity_level="INFO",
-                    request_id=request_id,
-                    resource="rag_service"
-                )
-                
-                logger.info("No relevant documents found in RAG search")
-        
-        # Prepare conversation messages with context
-        conversation_messages = []
-        
-        # Add conversation history if provided
-        if request.messages:
-            logger.info(f"Processing {len(request.messages)} conversation history messages")
-            for i, msg in enumerate(request.messages):
-                conversation_messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
-                logger.debug(f"History message {i}: {msg.role} - {msg.content[:50]}...")
-        else:
-            logger.info("No conversation history provided")
-        
-        # Prepare the current message with RAG context if available
-        current_message = request.message
-        if context:
-            current_message = f"""Based on the following legal documents and context, please answer the question:
-
-CONTEXT:
-{context}
-
-QUESTION: {request.message}
-
-Please provide a comprehensive answer based on the provided documents. If the documents don't contain relevant information, please indicate this clearly."""
-            
-            # Debug: Log the enhanced message
-            logger.info(f"RAG Enhanced Message - Length: {len(current_message)} chars")
-            logger.info(f"RAG Enhanced Message - Preview: {current_message[:300]}...")
-        else:
-            logger.info("RAG - No context found, sending original message only")
-        
-        # Add the current message to conversation
-        conversation_messages.append({
-            "role": "user",
-            "content": current_message
-        })
-        
-        # Log LLM API call initiation
-        log_chat_audit(
-            action_type="LLM_API_CALL_INITIATED",
-            status="initiated",
-            details=f"Sending request to LLM API. Conversation length: {len(conversation_messages)} messages, Current message length: {len(current_message)} chars",
-            ip_address=ip_address,
-            content_hash=hash_content(current_message),
-            severity_level="INFO",
-            request_id=request_id,
-            resource="llm_api"
+        conversation_messages, sources, rag_documents_found = prepare_conversation(
+            request, ip_address, prompt_hash, request_id
         )
         
         # Call the remote LLM with conversation history
@@ -369,12 +390,27 @@ Please provide a comprehensive answer based on the provided documents. If the do
             detail=f"Failed to process chat request: {str(e)}"
         )
 
-@router.post("/stream", response_model=ChatResponse)
-async def chat_completion_stream(request: ChatRequest, http_request: Request):
+def sse_event(data, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event carrying a JSON payload"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chat_completion_stream(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_user)
+):
     """
-    Stream chat completion for real-time responses
-    Currently returns full response - can be enhanced for true streaming
+    Stream chat completion for real-time responses as Server-Sent Events
+    The first event (event: sources) lists the RAG sources, each following
+    data event carries {"content": <text chunk>}, and the stream ends with
+    event: done, or event: error if the LLM fails mid-response
+    REQUIRES AUTHENTICATION: JWT token or API key
     """
+    start_time = time.time()
+    request_id = str(uuid.uuid4())
+    
     # Log streaming request
     ip_address = get_client_ip(http_request)
     user_agent = http_request.headers.get("User-Agent", "unknown")
@@ -388,12 +424,103 @@ async def chat_completion_stream(request: ChatRequest, http_request: Request):
         user_agent=user_agent,
         content_hash=prompt_hash,
         severity_level="INFO",
+        request_id=request_id,
         resource="chat_stream"
     )
     
-    # For now, delegate to regular completion
-    # This can be enhanced later for true streaming with Server-Sent Events
-    return await chat_completion(request, http_request)
+    try:
+        conversation_messages, sources, rag_documents_found = prepare_conversation(
+            request, ip_address, prompt_hash, request_id
+        )
+        
+        # Filled with the token usage reported at the end of the stream
+        token_usage = {}
+        chunks = llm_client.chat_completion_stream(
+            messages=conversation_messages,
+            max_tokens=request.max_tokens or settings.MAX_TOKENS,
+            temperature=request.temperature or settings.TEMPERATURE,
+            usage=token_usage
+        )
+        
+        # Pull the first chunk before responding so an unreachable LLM is still an HTTP error
+        try:
+            first_chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            first_chunk = ""
+        
+    except Exception as e:
+        processing_time = time.time() - start_time
+        error_msg = f"Unexpected error in chat completion stream: {str(e)}"
+        
+        log_chat_audit(
+            action_type="CHAT_SYSTEM_ERROR",
+            status="error",
+            details=f"System error after {processing_time:.2f}s: {error_msg}",
+            ip_address=ip_address,
+            user_agent=user_agent,
+            content_hash=prompt_hash,
+            severity_level="ERROR",
+            request_id=request_id,
+            resource="chat_stream"
+        )
+        
+        logger.error(error_msg)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process chat request: {str(e)}"
+        )
+    
+    async def event_stream():
+        yield sse_event(sources, event="sources")
+        
+        response_length = len(first_chunk)
+        if first_chunk:
+            yield sse_event({"content": first_chunk})
+        
+        try:
+            async for chunk in chunks:
+                response_length += len(chunk)
+                yield sse_event({"content": chunk})
+        except Exception as e:
+            processing_time = time.time() - start_time
+            error_msg = f"LLM stream interrupted: {str(e)}"
+            
+            log_chat_audit(
+                action_type="CHAT_SYSTEM_ERROR",
+                status="error",
+                details=f"System error after {processing_time:.2f}s: {error_msg}",
+                ip_address=ip_address,
+                user_agent=user_agent,
+                content_hash=prompt_hash,
+                severity_level="ERROR",
+                request_id=request_id,
+                resource="chat_stream"
+            )
+            
+            logger.error(error_msg)
+            yield sse_event({"detail": "The response was interrupted. Please try again."}, event="error")
+            return
+        
+        processing_time = time.time() - start_time
+        log_chat_audit(
+            action_type="CHAT_COMPLETED",
+            status="success",
+            details=f"Chat stream completed successfully. Processing time: {processing_time:.2f}s, "
+                   f"Response length: {response_length} chars, "
+                   f"Tokens used: {token_usage.get('total_tokens', 'unknown')}, "
+                   f"RAG documents: {rag_documents_found}",
+            ip_address=ip_address,
+            user_agent=user_agent,
+            content_hash=prompt_hash,
+            severity_level="INFO",
+            request_id=request_id,
+            resource="chat_stream"
+        )
+        
+        logger.info(f"Stream processed in {processing_time:.2f} seconds")
+        yield sse_event({"processing_time": processing_time, "usage": token_usage}, event="done")
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 @router.get("/models")
 async def list_available_models(http_request: Request):
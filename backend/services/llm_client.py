@@ -5,7 +5,8 @@ Handles communication with remote LLaMA 3 70B model via OpenAI-compatible API
 
 import httpx
 import asyncio
-from typing import Dict, Any, List, Optional
+import json
+from typing import Dict, Any, List, Optional, AsyncIterator
 from loguru import logger
 
 from ..config import settings
@@ -26,30 +27,16 @@ class LLMClient:
         if not self.api_url or not self.api_key:
             logger.warning("LLM API not fully configured - check environment variables")
     
-    async def chat_completion(
-        self, 
-        message: str = None,
-        messages: Optional[List[Dict[str, str]]] = None, 
-        max_tokens: int = 2048, 
-        temperature: float = 0.7,
-        system_message: Optional[str] = None
+    def _build_payload(
+        self,
+        message: Optional[str],
+        messages: Optional[List[Dict[str, str]]],
+        max_tokens: int,
+        temperature: float,
+        system_message: Optional[str],
+        stream: bool
     ) -> Dict[str, Any]:
-        """
-        Send chat completion request to remote LLM
-        
-        Args:
-            message: User's input message (deprecated, use messages instead)
-            messages: Full conversation history in OpenAI format
-            max_tokens: Maximum tokens in response
-            temperature: Response creativity (0.0-1.0)
-            system_message: Optional system prompt
-            
-        Returns:
-            Dictionary containing response content and metadata
-        """
-        if not self.api_url or not self.api_key:
-            raise ValueError("LLM API not configured - check LLM_API_URL and LLM_API_KEY")
-        
+        """Build the OpenAI-compatible request body shared by the plain and streaming completions"""
         # Prepare messages in OpenAI format
         if messages:
             # Use provided conversation history
@@ -89,13 +76,46 @@ class LLMClient:
             "messages": formatted_messages,
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "stream": False
+            "stream": stream
         }
-        
-        headers = {
+        if stream:
+            # Ask for a final chunk carrying token usage, as the plain completion reports it
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """Build the authenticated request headers for the LLM API"""
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+    
+    async def chat_completion(
+        self, 
+        message: str = None,
+        messages: Optional[List[Dict[str, str]]] = None, 
+        max_tokens: int = 2048, 
+        temperature: float = 0.7,
+        system_message: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send chat completion request to remote LLM
+        
+        Args:
+            message: User's input message (deprecated, use messages instead)
+            messages: Full conversation history in OpenAI format
+            max_tokens: Maximum tokens in response
+            temperature: Response creativity (0.0-1.0)
+            system_message: Optional system prompt
+            
+        Returns:
+            Dictionary containing response content and metadata
+        """
+        if not self.api_url or not self.api_key:
+            raise ValueError("LLM API not configured - check LLM_API_URL and LLM_API_KEY")
+        
+        payload = self._build_payload(message, messages, max_tokens, temperature, system_message, stream=False)
+        headers = self._build_headers()
         
         try:
             async with httpx.AsyncClient(timeout=self.timeout) as client:
@@ -135,6 +155,69 @@ class LLMClient:
             logger.error(f"Unexpected error calling LLM API: {str(e)}")
             raise Exception(f"Failed to call LLM API: {str(e)}")
     
+    async def chat_completion_stream(
+        self, 
+        message: str = None,
+        messages: Optional[List[Dict[str, str]]] = None, 
+        max_tokens: int = 2048, 
+        temperature: float = 0.7,
+        system_message: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from remote LLM
+        
+        Takes the same arguments as chat_completion, but requests a streamed
+        response and yields the content deltas of its server-sent events as
+        they arrive. If a usage dict is given, it is filled with the token usage
+        the API reports in its final chunk (servers that do not report usage
+        leave it empty).
+        
+        Yields:
+            Chunks of response text
+        """
+        if not self.api_url or not self.api_key:
+            raise ValueError("LLM API not configured - check LLM_API_URL and LLM_API_KEY")
+        
+        payload = self._build_payload(message, messages, max_tokens, temperature, system_message, stream=True)
+        headers = self._build_headers()
+        
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                logger.info(f"Sending streaming request to LLM API: {self.api_url}")
+                
+                async with client.stream("POST", self.api_url, json=payload, headers=headers) as response:
+                    response.raise_for_status()
+                    
+                    async for line in response.aiter_lines():
+                        # Events are "data: {json}" lines; blank lines separate them
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        event = json.loads(data)
+                        if usage is not None and event.get("usage"):
+                            usage.update(event["usage"])
+                        
+                        choices = event.get("choices") or [{}]
+                        content = choices[0].get("delta", {}).get("content")
+                        if content:
+                            yield content
+                    
+        except httpx.TimeoutException:
+            logger.error("Timeout occurred while streaming from LLM API")
+            raise Exception("LLM API request timed out")
+            
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error from LLM API: {e.response.status_code}")
+            raise Exception(f"LLM API returned error: {e.response.status_code}")
+            
+        except Exception as e:
+            logger.error(f"Unexpected error streaming from LLM API: {str(e)}")
+            raise Exception(f"Failed to call LLM API: {str(e)}")
+    
     async def list_models(self) -> List[str]:
         """
         List available models from the remote API
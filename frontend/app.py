@@ -4,14 +4,25 @@ Features: Authentication, themes, document management, analytics
 """
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from streamlit_autorefresh import st_autorefresh
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 import os
+import io
 import uuid
-import hashlib
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, cached_property
+from itertools import islice
 from datetime import datetime, date
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Iterator
 import json
+import orjson
+import pandas as pd
 
 # Import our custom modules
 try:
@@ -36,21 +47,363 @@ API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 BACKEND_PORT = os.getenv("BACKEND_PORT", "8000")
 DEFAULT_TIMEOUT = 60
 UPLOAD_TIMEOUT = 120
+VIEW_CACHE_TTL = 30  # seconds a view's query results are reused within a session
+HEALTH_CHECK_INTERVAL = 30  # seconds between service status refreshes
+# Health endpoints probed together for the status panel: (url, timeout)
+SERVICE_HEALTH_ENDPOINTS = (
+    (f"{API_BASE_URL}/health", 5),  # backend API
+    ("http://localhost:1234/v1/models", 3)  # AI service
+)
+DOCUMENT_API_HEADERS = {"Authorization": "Bearer internal-secret-key"}
 DEFAULT_MAX_TOKENS = 2048
 DEFAULT_TEMPERATURE = 0.7
+ERROR_TEXT_LIMIT = 2048  # bytes of an error response body kept for messages and audit details
+
+# Audit log display lookups (text-based status indicators, no emojis)
+STATUS_INDICATORS = {
+    'success': '[SUCCESS]',
+    'failure': '[FAILED]',
+    'error': '[ERROR]',
+    'initiated': '[INITIATED]'
+}
+# Recent activity item class by login status; anything but success is a failure
+ACTIVITY_STATUS_CLASSES = {'success': 'success-item'}
+SEVERITY_ROW_STYLES = {
+    'ERROR': 'background-color: rgba(255, 75, 75, 0.15)',
+    'WARNING': 'background-color: rgba(255, 193, 7, 0.15)'
+}
+
+# Audit filters edited through the filter form; widget keys are prefixed with audit_filter_
+AUDIT_FILTER_WIDGET_KEYS = ('action_type', 'username', 'status', 'severity_level', 'date_from', 'date_to')
+# Choices offered by the audit filter selectboxes ('' means any)
+AUDIT_ACTION_TYPES = ('', 'LOGIN', 'CHAT', 'DOC_UPLOAD', 'DOC_DELETE', 'PASSWORD', 'USER_CREATE', 'AUDIT')
+AUDIT_STATUSES = ('', 'success', 'failure', 'error', 'initiated')
+AUDIT_SEVERITY_LEVELS = ('', 'INFO', 'WARNING', 'ERROR')
+
+# Audit log fields shown in the audit table, in display order
+AUDIT_TABLE_COLUMNS = {
+    'timestamp': 'Time',
+    'status': 'Status',
+    'action_type': 'Action',
+    'username': 'User',
+    'severity_level': 'Severity',
+    'resource': 'Resource',
+    'ip_address': 'IP',
+    'session_id': 'Session',
+    'content_hash': 'Content Hash',
+    'details': 'Details'
+}
+
+# HTML templates for analytics cards (classes defined in theme.py)
+METRIC_CARD_HTML = (
+    '<div class="metric-card"><div class="metric-value{value_class}">{value}</div>'
+    '<div class="metric-label">{label}</div></div>'
+)
+ACTIVITY_CARD_HTML = '<div class="info-card"><strong>{timestamp} - {role}:</strong><br>{content}</div>'
+
+# Ultra-compact layout for the chat history sidebar
+CHAT_SIDEBAR_CSS = """
+<style>
+.stButton {
+    margin-bottom: 0.1rem !important;
+}
+.stButton > button {
+    padding: 0.15rem 0.3rem !important;
+    font-size: 0.8rem !important;
+    margin: 0 !important;
+    border-radius: 4px !important;
+    min-height: 24px !important;
+}
+div[data-testid="column"] {
+    padding: 0 1px !important;
+}
+div[data-testid="stVerticalBlock"] > div {
+    gap: 0.1rem !important;
+}
+.element-container {
+    margin-bottom: 0.1rem !important;
+}
+.block-container {
+    padding-top: 1rem !important;
+    padding-bottom: 0.5rem !important;
+}
+hr {
+    margin: 0.2rem 0 !important;
+}
+</style>
+"""
+
+# Styles for the user management header, add-user form and statistics cards
+USER_MANAGEMENT_CSS = """
+<style>
+.management-header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    border-radius: 16px;
+    padding: 32px;
+    margin: 16px 0;
+    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+    backdrop-filter: blur(10px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+    text-align: center;
+}
+
+.header-title {
+    color: white;
+    font-size: 2.5rem;
+    font-weight: 700;
+    margin-bottom: 12px;
+}
+
+.header-subtitle {
+    color: rgba(255, 255, 255, 0.9);
+    font-size: 1.2rem;
+    font-weight: 400;
+}
+
+.form-container {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    border-radius: 16px;
+    padding: 32px;
+    margin: 16px 0;
+    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+    backdrop-filter: blur(10px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+}
+
+.form-header {
+    color: white;
+    font-size: 1.5rem;
+    font-weight: 600;
+    margin-bottom: 20px;
+    text-align: center;
+}
+
+.form-section {
+    margin-bottom: 16px;
+}
+
+.input-label {
+    color: white;
+    font-weight: 500;
+    margin-bottom: 8px;
+    display: block;
+}
+
+.security-info {
+    background: rgba(255, 255, 255, 0.1);
+    border-radius: 12px;
+    padding: 16px;
+    margin-top: 20px;
+    border: 1px solid rgba(255, 255, 255, 0.2);
+}
+
+.security-title {
+    color: white;
+    font-weight: 600;
+    margin-bottom: 12px;
+}
+
+.security-item {
+    color: rgba(255, 255, 255, 0.9);
+    font-size: 0.9rem;
+    margin-bottom: 4px;
+}
+
+.stats-container {
+    display: flex;
+    gap: 16px;
+    margin: 20px 0;
+    flex-wrap: wrap;
+}
+
+.stat-card {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    border-radius: 16px;
+    padding: 24px;
+    flex: 1;
+    min-width: 200px;
+    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+    backdrop-filter: blur(10px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+    text-align: center;
+    transition: all 0.3s ease;
+}
+
+.stat-card:hover {
+    transform: translateY(-4px);
+    box-shadow: 0 12px 40px rgba(0, 0, 0, 0.15);
+}
+
+.stat-number {
+    font-size: 2.2rem;
+    font-weight: bold;
+    color: white;
+    margin-bottom: 8px;
+}
+
+.stat-label {
+    color: rgba(255, 255, 255, 0.9);
+    font-size: 1rem;
+    font-weight: 500;
+}
+
+.activity-card {
+    background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
+    border-radius: 16px;
+    padding: 24px;
+    margin: 20px 0;
+    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+    backdrop-filter: blur(10px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+}
+
+.activity-header {
+    color: white;
+    font-size: 1.3rem;
+    font-weight: 600;
+    margin-bottom: 16px;
+    text-align: center;
+}
+
+.activity-item {
+    background: rgba(255, 255, 255, 0.1);
+    border-radius: 8px;
+    padding: 12px;
+    margin: 8px 0;
+    color: white;
+    border-left: 4px solid rgba(255, 255, 255, 0.3);
+}
+
+.success-item {
+    border-left-color: #28a745;
+}
+
+.failed-item {
+    border-left-color: #dc3545;
+}
+</style>
+"""
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=256)
+def _format_timestamp(iso_timestamp: str, length: int = 16) -> str:
+    """Format an ISO/SQLite timestamp for display by slicing, e.g. 2024-01-31 14:05"""
+    return iso_timestamp[:length].replace('T', ' ') if iso_timestamp else 'Unknown'
+
+def _error_text(response: requests.Response, limit: int = ERROR_TEXT_LIMIT) -> str:
+    """Start of an error response body, read only up to limit bytes (proxies can return whole HTML pages)"""
+    chunk = next(response.iter_content(limit), b"")
+    text = chunk.decode(response.encoding or 'utf-8', errors='replace')
+    return text + "...[truncated]" if len(chunk) >= limit else text
+
+@st.cache_resource(show_spinner=False)
+def _get_db_manager() -> DatabaseManager:
+    """Process-wide database manager, so schema setup and cleanup run once rather than per rerun"""
+    return DatabaseManager()
+
+@st.cache_resource(show_spinner=False)
+def _get_http_session() -> requests.Session:
+    """Keep-alive HTTP session shared by reruns so backend and AI service calls reuse connections"""
+    session = requests.Session()
+    # Pooled connections for concurrent sessions; transient gateway errors are
+    # retried for idempotent methods only (urllib3 never retries POST by default).
+    # Connect and read failures are not retried: a hung backend would otherwise
+    # cost every health probe and GET three full timeouts
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=2,
+            connect=0,
+            read=0,
+            status=2,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False  # hand the final error response back to the caller
+        )
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": "LegalAIAssistant-Frontend"})
+    return session
+
+def _service_is_online(session: requests.Session, url: str, timeout: float) -> bool:
+    """Probe a single health endpoint"""
+    try:
+        return session.get(url, timeout=timeout).status_code == 200
+    except Exception:
+        return False
+
+@st.cache_data(ttl=HEALTH_CHECK_INTERVAL, show_spinner=False)
+def _services_are_online(endpoints: tuple) -> List[bool]:
+    """Health probes shared by all sessions, run concurrently; refresh_all_data clears it to re-probe"""
+    session = _get_http_session()  # resolved here: cache lookups need the script thread
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as pool:
+        return list(pool.map(lambda endpoint: _service_is_online(session, *endpoint), endpoints))
+
+@st.cache_data(ttl=15, show_spinner=False)
+def _get_users_cached(_db_manager: DatabaseManager, version: int) -> List[Dict[str, Any]]:
+    """Cached user list shared by the user management tabs; bump version to invalidate"""
+    return _db_manager.get_users()
+
+@st.cache_data(ttl=15, show_spinner=False)
+def _get_user_counts_cached(_db_manager: DatabaseManager, version: int, locked_threshold: int) -> Dict[str, int]:
+    """Cached user statistics; shares the user list's version for invalidation"""
+    return _db_manager.get_user_counts(locked_threshold)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _get_recent_logins_cached(_db_manager: DatabaseManager, limit: int) -> List[Dict[str, Any]]:
+    """Most recent login audit events for the user statistics panel"""
+    return _db_manager.get_recent_logins(limit)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_chat_sessions_cached(_db_manager: DatabaseManager, user_id: int, version: int) -> List[Dict[str, Any]]:
+    """Cached chat session list for the history sidebar; bump version to invalidate"""
+    sessions = _db_manager.get_user_chat_sessions(user_id)
+    for session in sessions:
+        # Truncate very long titles for better display in sidebar
+        title = session['title']
+        session['display_title'] = title if len(title) <= 25 else title[:22] + "..."
+    return sessions
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_chat_messages_cached(_db_manager: DatabaseManager, session_id: int, user_id: int,
+                              version: int) -> Optional[List[Dict[str, Any]]]:
+    """Cached messages of one chat session; shares the session list's version for invalidation"""
+    return _db_manager.get_chat_messages(session_id, user_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_document_list() -> List[Dict[str, Any]]:
+    """Uploaded documents as listed by the backend; failed requests raise and are not cached"""
+    response = _get_http_session().get(
+        f"{API_BASE_URL}/api/v1/documents/list",
+        headers=DOCUMENT_API_HEADERS,
+        timeout=DEFAULT_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json().get("documents", [])
+
 class LawFirmAIApp:
     """Main application class for Law Firm AI Assistant"""
     
     def __init__(self):
-        self.auth_manager = AuthManager()
+        self.db_manager = _get_db_manager()
+        self.auth_manager = AuthManager(self.db_manager)
         self.theme_manager = ThemeManager()
-        self.db_manager = DatabaseManager()
         self.session_id = self._get_or_create_session_id()
-        self._initialize_session_state()
+    
+    @cached_property
+    def _views(self) -> Dict[str, Any]:
+        """Main content renderers keyed by st.session_state.current_view"""
+        return {
+            'chat': self.render_chat_interface,
+            'documents': self.render_document_management,
+            'analytics': self.render_analytics_dashboard,
+            'audit': self.render_audit_logs,
+            'users': self.render_user_management
+        }
     
     def _get_auth_headers(self) -> Dict[str, str]:
         """Get authentication headers for API requests"""
@@ -79,30 +432,19 @@ class LawFirmAIApp:
         return st.session_state.session_id
     
     def _get_client_ip(self) -> str:
-        """Get client IP address from request headers"""
-        try:
-            # Try to get real IP from headers (works with reverse proxies)
-            if 'X-Forwarded-For' in st.context.headers:
-                return st.context.headers['X-Forwarded-For'].split(',')[0].strip()
-            elif 'X-Real-IP' in st.context.headers:
-                return st.context.headers['X-Real-IP']
-            else:
-                return "127.0.0.1"  # Fallback for local development
-        except Exception:
-            return "unknown"
+        """Get client IP address from request headers (read once per session)"""
+        return self.auth_manager.get_client_ip()
     
     def _get_user_agent(self) -> str:
-        """Get user agent from request headers"""
-        try:
-            return st.context.headers.get('User-Agent', 'unknown')
-        except Exception:
-            return "unknown"
+        """Get user agent from request headers (read once per session)"""
+        return self.auth_manager.get_user_agent()
     
     def _initialize_session_state(self):
         """Initialize session state variables"""
         default_values = {
             'messages': [],
             'documents_uploaded': [],
+            'document_options': {},
             'api_status': 'unknown',
             'ai_service_status': 'unknown',
             'current_view': 'chat',
@@ -115,55 +457,48 @@ class LawFirmAIApp:
             'chat_sessions': [],
             'chat_sessions_loaded': False,
             'chat_history_needs_refresh': False,
+            # Chat whose options menu is open, and the (session_id, mode) panel shown below it
+            'open_chat_menu_id': None,
+            'active_chat_mode': None,
+            # Bumped on chat mutations to invalidate the cached sessions and messages
+            'chat_version': 0,
             # Document selection for context
             'selected_document_ids': [],
             # Document deletion confirmation
             'confirm_delete_document': None,
             # Chat UI state
-            'message_being_sent': False
+            'message_being_sent': False,
+            # Bumped on user mutations to invalidate the cached user list
+            'users_version': 0,
+            # (user_id, kind) of the open role change or delete confirmation panel
+            'user_action': None
         }
         
         for key, value in default_values.items():
             if key not in st.session_state:
                 st.session_state[key] = value
     
-    def check_api_health(self):
-        """Check if the backend API is running"""
-        try:
-            response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-            if response.status_code == 200:
-                st.session_state.api_status = "online"
-            else:
-                st.session_state.api_status = "offline"
-        except Exception:
-            st.session_state.api_status = "offline"
-    
-    def check_ai_service_health(self):
-        """Check if the AI service (localhost:1234) is running"""
-        try:
-            response = requests.get("http://localhost:1234/v1/models", timeout=3)
-            if response.status_code == 200:
-                st.session_state.ai_service_status = "online"
-            else:
-                st.session_state.ai_service_status = "offline"
-        except Exception:
-            st.session_state.ai_service_status = "offline"
+    def check_services_health(self):
+        """Check if the backend API and the AI service (localhost:1234) are running"""
+        api_online, ai_online = _services_are_online(SERVICE_HEALTH_ENDPOINTS)
+        st.session_state.api_status = "online" if api_online else "offline"
+        st.session_state.ai_service_status = "online" if ai_online else "offline"
     
     def refresh_all_data(self):
         """Refresh all application data - useful when API was offline"""
         with st.spinner("Refreshing application data..."):
-            # Check API health
-            self.check_api_health()
-            self.check_ai_service_health()
+            # Check API health, bypassing the cached probe results
+            _services_are_online.clear()
+            self.check_services_health()
             
             # Reset chat-related states
-            st.session_state.chat_history_needs_refresh = True
+            self._invalidate_chat_history()
             st.session_state.chat_sessions_loaded = False
             
             # Refresh document list
             st.session_state.documents_uploaded = []
             if st.session_state.api_status == "online":
-                self.load_document_list()
+                self.load_document_list(refresh=True)
             
             # Clear document list cache if it exists
             if 'documents_list' in st.session_state:
@@ -199,8 +534,22 @@ class LawFirmAIApp:
         </div>
         """, unsafe_allow_html=True)
     
+    @st.fragment(run_every=HEALTH_CHECK_INTERVAL)
     def render_api_status(self):
-        """Render API and AI service connection status with refresh option"""
+        """
+        Render API and AI service connection status with refresh option
+        
+        Runs as a fragment on a timer: the status re-reads the shared, cached
+        health probes without rerunning the page, and triggers a full rerun only
+        when a service changes state.
+        """
+        previous_status = (st.session_state.api_status, st.session_state.ai_service_status)
+        self.check_services_health()
+        if "unknown" not in previous_status and previous_status != (
+            st.session_state.api_status, st.session_state.ai_service_status
+        ):
+            st.rerun()
+        
         # Backend API Status
         if st.session_state.api_status == "online":
             self.theme_manager.render_status_indicator("online", "Backend API Connected")
@@ -222,6 +571,7 @@ class LawFirmAIApp:
                         use_container_width=True,
                         type="primary"):
                 self.refresh_all_data()
+                st.rerun()
     
     def render_navigation(self):
         """Render navigation menu with chat history"""
@@ -252,8 +602,15 @@ class LawFirmAIApp:
                     st.session_state.current_view = view_key
                     st.rerun()
     
+    @st.fragment
     def render_chat_history_sidebar(self):
-        """Render chat history in sidebar with improved UI"""
+        """
+        Render chat history in sidebar with improved UI
+
+        Runs as a fragment so menu, rename and refresh interactions rerun only
+        the chat list; loading, starting or deleting a chat reruns the app,
+        since the main view changes with it.
+        """
         current_user = self.auth_manager.get_current_user()
         if not current_user:
             return
@@ -262,7 +619,9 @@ class LawFirmAIApp:
         
         # Load chat sessions if not already loaded
         if not st.session_state.chat_sessions_loaded or st.session_state.chat_history_needs_refresh:
-            st.session_state.chat_sessions = self.db_manager.get_user_chat_sessions(current_user['id'])
+            st.session_state.chat_sessions = _get_chat_sessions_cached(
+                self.db_manager, current_user['id'], st.session_state.chat_version
+            )
             st.session_state.chat_sessions_loaded = True
             st.session_state.chat_history_needs_refresh = False
         
@@ -273,16 +632,17 @@ class LawFirmAIApp:
                 self.start_new_chat()
         
         with col2:
-            if st.button("Refresh", help="Refresh chat list", use_container_width=True):
-                st.session_state.chat_history_needs_refresh = True
-                st.rerun()
+            st.button("Refresh", help="Refresh chat list", use_container_width=True,
+                      on_click=self._invalidate_chat_history)
         
         # Current session indicator
-        if st.session_state.current_chat_session_id:
-            current_session = self.db_manager.get_chat_session_info(
-                st.session_state.current_chat_session_id, 
-                current_user['id']
-            )
+        current_session_id = st.session_state.current_chat_session_id
+        if current_session_id:
+            # The loaded session list is current as of the last invalidation; query only if it is missing there
+            current_session = next(
+                (session for session in st.session_state.chat_sessions if session['id'] == current_session_id),
+                None
+            ) or self.db_manager.get_chat_session_info(current_session_id, current_user['id'])
             if current_session:
                 st.info(f"**Current:** {current_session['title']}")
         
@@ -290,100 +650,46 @@ class LawFirmAIApp:
         if st.session_state.chat_sessions:
             st.markdown("**Recent Chats:**")
             
-            # Add custom CSS for better chat item styling and ultra-compact layout
-            st.markdown("""
-            <style>
-            .chat-item {
-                border-radius: 6px;
-                padding: 2px 4px;
-                margin: 0.5px 0;
-                background-color: rgba(0,0,0,0.02);
-                position: relative;
-            }
-            .chat-item:hover {
-                background-color: rgba(0,0,0,0.05);
-                transition: background-color 0.2s;
-            }
-            .current-chat {
-                border-left: 3px solid #00d4aa;
-                background-color: rgba(0,212,170,0.08);
-            }
-            /* Ultra compact styling for better space usage */
-            .stButton > button {
-                padding: 0.15rem 0.3rem !important;
-                font-size: 0.8rem !important;
-                margin: 0 !important;
-                border-radius: 4px !important;
-                min-height: 24px !important;
-            }
-            
-            /* Compact columns with minimal spacing */
-            div[data-testid="column"] {
-                padding: 0 1px !important;
-            }
-            
-            /* Reduce space between elements */
-            .element-container {
-                margin-bottom: 0.1rem !important;
-            }
-            
-            /* Make chat history more compact */
-            .chat-history-container {
-                padding: 1px 0;
-            }
-            
-            /* Compact menu buttons */
-            .menu-buttons {
-                gap: 1px;
-                display: flex;
-                flex-wrap: nowrap;
-            }
-            
-            /* Reduce separator spacing */
-            hr {
-                margin: 0.2rem 0 !important;
-            }
-            
-            /* Minimize container spacing */
-            .block-container {
-                padding-top: 1rem !important;
-                padding-bottom: 0.5rem !important;
-            }
-            
-            /* Make containers tighter */
-            div[data-testid="stVerticalBlock"] > div {
-                gap: 0.1rem !important;
-            }
-            
-            /* Ultra-compact chat buttons */
-            .stButton {
-                margin-bottom: 0.1rem !important;
-            }
-            
-
-            </style>
-            """, unsafe_allow_html=True)
+            # Compact layout for the chat list (re-emitted every run; Streamlit drops elements that are not)
+            st.markdown(CHAT_SIDEBAR_CSS, unsafe_allow_html=True)
             
             for session in st.session_state.chat_sessions[:10]:  # Show last 10 chats
                 self._render_chat_item(session, current_user)
         else:
             st.info("No previous chats. Start a new conversation!")
     
+    def _rerun_chat_history(self):
+        """Rerun only the chat history fragment; a full run cannot be fragment-scoped, so rerun the app then"""
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            st.rerun()
+    
+    def _toggle_chat_menu(self, session_id: int):
+        """Button callback: toggle a chat's options menu; only one menu is open at a time"""
+        is_open = st.session_state.open_chat_menu_id == session_id
+        st.session_state.open_chat_menu_id = None if is_open else session_id
+    
+    def _open_chat_mode(self, session_id: int, mode: str):
+        """Button callback: open a chat's rename, delete or details panel from its menu"""
+        st.session_state.active_chat_mode = (session_id, mode)
+        st.session_state.open_chat_menu_id = None
+    
+    def _close_chat_mode(self):
+        """Button callback: close the open rename, delete or details panel"""
+        st.session_state.active_chat_mode = None
+    
     def _render_chat_item(self, session: dict, current_user: dict):
         """Render individual chat item with 3-dots menu"""
         session_id = session['id']
+        is_current = session_id == st.session_state.current_chat_session_id
+        display_title = session['display_title']
         
         # Proper horizontal alignment: title left, menu button right
         col1, col2 = st.columns([6, 1])
         
         with col1:
             # Chat title and click action
-            title = session['title']
-            is_current = session_id == st.session_state.current_chat_session_id
-            
-            # Truncate very long titles for better display in sidebar
-            display_title = title if len(title) <= 25 else title[:22] + "..."
-            
             # Different styling for current vs other sessions
             if is_current:
                 st.markdown(f"**• {display_title}** (Active)")
@@ -393,61 +699,39 @@ class LawFirmAIApp:
         
         with col2:
             # 3-dots menu button aligned to the right
-            show_menu_key = f"show_menu_{session_id}"
-            
-            # Initialize menu state if not exists
-            if show_menu_key not in st.session_state:
-                st.session_state[show_menu_key] = False
-            
-            # Three-dot menu button
-            if st.button("⋯", 
-                        key=f"options_{session_id}", 
-                        help="More options", 
-                        type="secondary",
-                        use_container_width=True):
-                # Toggle this menu
-                st.session_state[show_menu_key] = not st.session_state[show_menu_key]
-                
-                # Close all other menus
-                for other_session in st.session_state.chat_sessions:
-                    other_key = f"show_menu_{other_session['id']}"
-                    if other_key != show_menu_key and other_key in st.session_state:
-                        st.session_state[other_key] = False
+            st.button("⋯", 
+                      key=f"options_{session_id}", 
+                      help="More options", 
+                      type="secondary",
+                      use_container_width=True,
+                      on_click=self._toggle_chat_menu,
+                      args=(session_id,))
         
         # Show inline menu options if this menu is open
-        if st.session_state.get(show_menu_key, False):
-            with st.container():
-                # Menu options as buttons in a compact layout
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    if st.button("Rename", key=f"rename_btn_{session_id}", use_container_width=True, type="secondary"):
-                        st.session_state[f"rename_mode_{session_id}"] = True
-                        st.session_state[show_menu_key] = False
-                        st.rerun()
-                
-                with col2:
-                    if st.button("Delete", key=f"delete_btn_{session_id}", use_container_width=True, type="secondary"):
-                        st.session_state[f"delete_mode_{session_id}"] = True
-                        st.session_state[show_menu_key] = False
-                        st.rerun()
-                
-                with col3:
-                    if st.button("Details", key=f"details_btn_{session_id}", use_container_width=True, type="secondary"):
-                        st.session_state[f"details_mode_{session_id}"] = True
-                        st.session_state[show_menu_key] = False
-                        st.rerun()
+        if st.session_state.open_chat_menu_id == session_id:
+            # Menu options as buttons in a compact layout
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.button("Rename", key=f"rename_btn_{session_id}", use_container_width=True, type="secondary",
+                          on_click=self._open_chat_mode, args=(session_id, "rename"))
+            
+            with col2:
+                st.button("Delete", key=f"delete_btn_{session_id}", use_container_width=True, type="secondary",
+                          on_click=self._open_chat_mode, args=(session_id, "delete"))
+            
+            with col3:
+                st.button("Details", key=f"details_btn_{session_id}", use_container_width=True, type="secondary",
+                          on_click=self._open_chat_mode, args=(session_id, "details"))
         
         # Handle different modes
-        if st.session_state.get(f"rename_mode_{session_id}", False):
+        active_mode = st.session_state.active_chat_mode
+        if active_mode == (session_id, "rename"):
             self._handle_rename_chat(session_id, session['title'], current_user)
-        elif st.session_state.get(f"delete_mode_{session_id}", False):
+        elif active_mode == (session_id, "delete"):
             self._handle_delete_chat(session_id, session['title'])
-        elif st.session_state.get(f"details_mode_{session_id}", False):
-            self._show_chat_details(session)
-        
-        # Add minimal separator between chat items
-        st.markdown('<hr style="margin: 0.1rem 0; border: 0.3px solid rgba(0,0,0,0.08);">', unsafe_allow_html=True)
+        elif active_mode == (session_id, "details"):
+            self._show_chat_details(session, current_user)
     
     def _handle_rename_chat(self, session_id: int, current_title: str, current_user: dict):
         """Handle chat renaming with a text input dialog"""
@@ -489,11 +773,10 @@ class LawFirmAIApp:
                             )
                             
                             st.success("Chat renamed successfully!")
-                            st.session_state.chat_history_needs_refresh = True
+                            self._invalidate_chat_history()
                             # Clear the rename mode
-                            if f"rename_mode_{session_id}" in st.session_state:
-                                del st.session_state[f"rename_mode_{session_id}"]
-                            st.rerun()
+                            st.session_state.active_chat_mode = None
+                            self._rerun_chat_history()
                         else:
                             st.error("Failed to rename chat")
                     elif not new_title.strip():
@@ -502,115 +785,61 @@ class LawFirmAIApp:
                         st.info("No changes made")
             
             with col2:
-                if st.button("Cancel", key=f"cancel_rename_{session_id}", use_container_width=True):
-                    # Clear the rename mode
-                    if f"rename_mode_{session_id}" in st.session_state:
-                        del st.session_state[f"rename_mode_{session_id}"]
-                    st.rerun()
+                st.button("Cancel", key=f"cancel_rename_{session_id}", use_container_width=True,
+                          on_click=self._close_chat_mode)
     
-    def _show_chat_details(self, session: dict):
+    def _show_chat_details(self, session: dict, current_user: dict):
         """Show comprehensive chat session details in tabulated format"""
         with st.container():
             st.markdown("### Chat Details")
             
-            # Get additional details like last message
-            current_user = self.auth_manager.get_current_user()
-            session_id = session['id']
-            
             # Get messages to find the last message
-            messages = self.db_manager.get_chat_messages(session_id, current_user['id'])
-            last_message = ""
-            last_message_time = ""
-            
-            if messages and len(messages) > 0:
-                last_msg = messages[-1]  # Get the last message
-                last_message = last_msg['content'][:100] + "..." if len(last_msg['content']) > 100 else last_msg['content']
-                try:
-                    from datetime import datetime
-                    msg_time = datetime.fromisoformat(last_msg['created_at'])
-                    last_message_time = msg_time.strftime("%m/%d %H:%M")
-                except:
-                    last_message_time = "Unknown"
-            
-            # Format creation and update times
-            try:
-                from datetime import datetime
-                created = datetime.fromisoformat(session['created_at'])
-                updated = datetime.fromisoformat(session['updated_at'])
-                created_str = created.strftime("%m/%d %H:%M")
-                updated_str = updated.strftime("%m/%d %H:%M")
-                created_full = created.strftime("%Y-%m-%d %H:%M:%S")
-                updated_full = updated.strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Calculate metrics
-                days_ago = (datetime.now() - created).days
-                hours_ago = int((datetime.now() - updated).total_seconds() / 3600)
-            except:
-                created_str = "Unknown"
-                updated_str = "Unknown"
-                created_full = "Unknown"
-                updated_full = "Unknown"
-                days_ago = "Unknown"
-                hours_ago = "Unknown"
-            
-            # Create tabulated view using pandas DataFrame
-            import pandas as pd
-            
-            # Basic information table
-            basic_info = pd.DataFrame({
-                'Property': ['Chat Title', 'Session ID', 'Message Count', 'Days Old', 'Hours Since Update'],
-                'Value': [
-                    session['title'],
-                    str(session['id']),
-                    f"{session['message_count']} message{'s' if session['message_count'] != 1 else ''}",
-                    str(days_ago),
-                    str(hours_ago)
+            messages = self._get_chat_messages(session['id'], current_user['id'])
+            last_msg = messages[-1] if messages else None
+            
+            # Parse creation, update and last message times in one pass; unparseable values become NaT
+            times = pd.to_datetime(
+                pd.Series([session['created_at'], session['updated_at'], last_msg['created_at'] if last_msg else None]),
+                errors="coerce",
+                format="ISO8601"
+            )
+            short_times = times.dt.strftime("%m/%d %H:%M").fillna("Unknown")
+            full_times = times.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("Unknown")
+            
+            # Calculate metrics
+            now = pd.Timestamp.now()
+            created, updated = times[0], times[1]
+            days_ago = (now - created).days if pd.notna(created) else "Unknown"
+            hours_ago = int((now - updated).total_seconds() / 3600) if pd.notna(updated) else "Unknown"
+            
+            message_count = session['message_count']
+            rows = [
+                ('Basic Information', 'Chat Title', session['title']),
+                ('Basic Information', 'Session ID', session['id']),
+                ('Basic Information', 'Message Count', f"{message_count} message{'s' if message_count != 1 else ''}"),
+                ('Basic Information', 'Days Old', days_ago),
+                ('Basic Information', 'Hours Since Update', hours_ago),
+                ('Timestamps', 'Created', full_times[0]),
+                ('Timestamps', 'Last Updated', full_times[1]),
+                ('Timestamps', 'Last Message', full_times[2] if last_msg else "No messages")
+            ]
+            if last_msg:
+                content = last_msg['content']
+                rows += [
+                    ('Last Message', 'Time', short_times[2]),
+                    ('Last Message', 'Content Preview', content[:100] + "..." if len(content) > 100 else content)
                 ]
-            })
-            
-            st.markdown("**Basic Information:**")
-            st.dataframe(basic_info, hide_index=True, use_container_width=True)
-            
-            # Timestamps table
-            timestamps = pd.DataFrame({
-                'Event': ['Created', 'Last Updated', 'Last Message'],
-                'Short Format': [created_str, updated_str, last_message_time if last_message_time else "No messages"],
-                'Full Format': [created_full, updated_full, last_message_time if last_message_time else "No messages"]
-            })
-            
-            st.markdown("**Timestamps:**")
-            st.dataframe(timestamps, hide_index=True, use_container_width=True)
-            
-            # Last message table (if exists)
-            if last_message:
-                message_info = pd.DataFrame({
-                    'Aspect': ['Time', 'Content Preview'],
-                    'Details': [last_message_time, last_message]
-                })
-                
-                st.markdown("**Last Message:**")
-                st.dataframe(message_info, hide_index=True, use_container_width=True)
-            else:
-                st.info("No messages in this chat session yet.")
             
-            # Display metrics as a summary table
-            metrics_data = pd.DataFrame({
-                'Metric': ['Total Messages', 'Chat Age (Days)', 'Last Activity (Hours Ago)'],
-                'Value': [
-                    session['message_count'],
-                    days_ago if days_ago != "Unknown" else 0,
-                    hours_ago if hours_ago != "Unknown" else 0
-                ]
-            })
+            # One table for all sections; values are strings so the column has a single type
+            details = pd.DataFrame.from_records(rows, columns=['Section', 'Property', 'Value'])
+            details['Value'] = details['Value'].astype(str)
+            st.dataframe(details, hide_index=True, use_container_width=True)
             
-            st.markdown("**Quick Stats:**")
-            st.dataframe(metrics_data, hide_index=True, use_container_width=True)
+            if not last_msg:
+                st.info("No messages in this chat session yet.")
             
-            if st.button("Close Details", key=f"close_details_{session['id']}", use_container_width=True):
-                # Clear the details mode
-                if f"details_mode_{session['id']}" in st.session_state:
-                    del st.session_state[f"details_mode_{session['id']}"]
-                st.rerun()
+            st.button("Close Details", key=f"close_details_{session['id']}", use_container_width=True,
+                      on_click=self._close_chat_mode)
     
     def _export_chat_session(self, session_id: int) -> bool:
         """Export a specific chat session to JSON"""
@@ -618,12 +847,12 @@ class LawFirmAIApp:
             current_user = st.session_state.user
             
             # Get chat session details
-            session = self.db_manager.get_chat_session(session_id, current_user['id'])
+            session = self.db_manager.get_chat_session_info(session_id, current_user['id'])
             if not session:
                 return False
             
             # Get messages for this session
-            messages = self.db_manager.get_chat_messages(session_id, current_user['id'])
+            messages = self.db_manager.get_chat_messages(session_id, current_user['id']) or []
             
             # Format for export
             export_data = {
@@ -637,25 +866,22 @@ class LawFirmAIApp:
                         "role": msg['role'],
                         "content": msg['content'],
                         "timestamp": msg['created_at'],
-                        "sources": msg.get('sources', [])
+                        "sources": msg['sources']
                     }
                     for msg in messages
                 ]
             }
             
-            # Create download
-            import json
-            from datetime import datetime
-            
-            json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
+            # orjson emits UTF-8 bytes that go straight to the download button
+            json_bytes = orjson.dumps(export_data, option=orjson.OPT_INDENT_2)
             filename = f"chat_export_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             
             st.download_button(
                 label="📥 Download Chat Export",
-                data=json_str,
+                data=json_bytes,
                 file_name=filename,
                 mime="application/json",
-                key=f"download_{session_id}_{datetime.now().timestamp()}"
+                key=f"download_{session_id}"
             )
             
             return True
@@ -687,51 +913,65 @@ class LawFirmAIApp:
                     if self.delete_chat_session(session_id):
                         st.success("Chat deleted successfully!")
                         # Clear the delete mode
-                        if f"delete_mode_{session_id}" in st.session_state:
-                            del st.session_state[f"delete_mode_{session_id}"]
+                        st.session_state.active_chat_mode = None
                         st.rerun()
                     else:
                         st.error("Failed to delete chat")
             
             with col2:
-                if st.button("Cancel", key=f"cancel_delete_{session_id}", use_container_width=True):
-                    # Clear the delete mode
-                    if f"delete_mode_{session_id}" in st.session_state:
-                        del st.session_state[f"delete_mode_{session_id}"]
-                    st.rerun()
+                st.button("Cancel", key=f"cancel_delete_{session_id}", use_container_width=True,
+                          on_click=self._close_chat_mode)
     
     def render_settings_sidebar(self):
         """Render settings in sidebar"""
+        # Fragments cannot open the sidebar themselves, so call it from inside
         with st.sidebar:
-            st.header("Settings")
-            
-            # RAG settings
-            use_rag = st.checkbox(
-                "Use Document Context", 
-                value=st.session_state.use_rag,
-                help="Enable RAG to use uploaded documents for context"
-            )
-            st.session_state.use_rag = use_rag
-            
-            # Token settings
-            max_tokens = st.slider(
-                "Max Response Tokens", 
-                100, 4000, 
-                st.session_state.max_tokens
-            )
-            st.session_state.max_tokens = max_tokens
-            
-            # Temperature settings
-            temperature = st.slider(
-                "Response Creativity", 
-                0.0, 1.0, 
-                st.session_state.temperature, 
-                0.1
-            )
-            st.session_state.temperature = temperature
+            self._render_settings_panel()
+    
+    @st.fragment
+    def _render_settings_panel(self):
+        """
+        Settings widgets; runs as a fragment so changing a setting reruns only
+        this panel (the values are read when the next chat request is built)
+        """
+        st.header("Settings")
+        
+        # RAG settings
+        use_rag = st.checkbox(
+            "Use Document Context", 
+            value=st.session_state.use_rag,
+            help="Enable RAG to use uploaded documents for context"
+        )
+        st.session_state.use_rag = use_rag
+        
+        # Token settings
+        max_tokens = st.slider(
+            "Max Response Tokens", 
+            100, 4000, 
+            st.session_state.max_tokens
+        )
+        st.session_state.max_tokens = max_tokens
+        
+        # Temperature settings
+        temperature = st.slider(
+            "Response Creativity", 
+            0.0, 1.0, 
+            st.session_state.temperature, 
+            0.1
+        )
+        st.session_state.temperature = temperature
     
     # Chat History Management Methods
     
+    def _get_chat_messages(self, session_id: int, user_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Get a session's messages through the chat history cache"""
+        return _get_chat_messages_cached(self.db_manager, session_id, user_id, st.session_state.chat_version)
+    
+    def _invalidate_chat_history(self):
+        """Invalidate the cached chat sessions and messages after a chat mutation"""
+        st.session_state.chat_version += 1
+        st.session_state.chat_history_needs_refresh = True
+    
     def start_new_chat(self):
         """Start a new chat session and redirect to chat view"""
         current_user = self.auth_manager.get_current_user()
@@ -746,7 +986,7 @@ class LawFirmAIApp:
             # Clear current messages and set new session
             st.session_state.messages = []
             st.session_state.current_chat_session_id = session_id
-            st.session_state.chat_history_needs_refresh = True
+            self._invalidate_chat_history()
             
             # Redirect to chat view regardless of current page
             st.session_state.current_view = 'chat'
@@ -776,7 +1016,7 @@ class LawFirmAIApp:
             return
         
         # Load messages from database
-        messages = self.db_manager.get_chat_messages(session_id, current_user['id'])
+        messages = self._get_chat_messages(session_id, current_user['id'])
         
         if messages is not None:  # None means unauthorized access
             # Convert database messages to session state format
@@ -785,7 +1025,7 @@ class LawFirmAIApp:
                 st.session_state.messages.append({
                     'role': msg['role'],
                     'content': msg['content'],
-                    'sources': msg.get('sources', [])
+                    'sources': msg['sources']
                 })
             
             st.session_state.current_chat_session_id = session_id
@@ -826,7 +1066,7 @@ class LawFirmAIApp:
                 st.session_state.messages = []
             
             # Refresh chat list
-            st.session_state.chat_history_needs_refresh = True
+            self._invalidate_chat_history()
             
             st.success("Chat deleted successfully")
             return True
@@ -834,8 +1074,8 @@ class LawFirmAIApp:
             st.error("Failed to delete chat")
             return False
     
-    def save_message_to_current_session(self, role: str, content: str, sources: List[str] = None):
-        """Save a message to the current chat session"""
+    def save_messages_to_current_session(self, messages: List[Dict[str, Any]]):
+        """Save chat history messages to the current chat session in one database write"""
         current_user = self.auth_manager.get_current_user()
         if not current_user:
             return
@@ -846,23 +1086,24 @@ class LawFirmAIApp:
             session_id = self.db_manager.create_chat_session(current_user['id'])
             if session_id:
                 st.session_state.current_chat_session_id = session_id
-                st.session_state.chat_history_needs_refresh = True
+                self._invalidate_chat_history()
             else:
                 st.error("Failed to create chat session")
                 return
         
-        # Save message to database
-        success = self.db_manager.add_chat_message(
+        # Save messages to database
+        success = self.db_manager.add_chat_messages(
             session_id=st.session_state.current_chat_session_id,
             user_id=current_user['id'],
-            role=role,
-            content=content,
-            sources=sources
+            messages=[
+                (message["role"], message["content"], message["sources"], None)
+                for message in messages
+            ]
         )
         
         if success:
             # Refresh chat sessions to update message count
-            st.session_state.chat_history_needs_refresh = True
+            self._invalidate_chat_history()
         else:
             st.warning("Message saved to session but not persisted to database")
     
@@ -886,28 +1127,29 @@ class LawFirmAIApp:
             if session_info:
                 session_title = session_info['title']
         
-        # Generate export content
-        export_content = f"Chat Export: {session_title}\n"
-        export_content += f"Exported on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        export_content += f"User: {current_user['username']}\n"
-        export_content += "=" * 50 + "\n\n"
+        # Generate export content into a buffer rather than re-copying a growing string per message
+        export_content = io.StringIO()
+        export_content.write(f"Chat Export: {session_title}\n")
+        export_content.write(f"Exported on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        export_content.write(f"User: {current_user['username']}\n")
+        export_content.write("=" * 50 + "\n\n")
         
         for msg in st.session_state.messages:
             role = "You" if msg['role'] == 'user' else "Legal Assistant"
-            export_content += f"{role}:\n{msg['content']}\n\n"
+            export_content.write(f"{role}:\n{msg['content']}\n\n")
             
-            if msg.get('sources'):
-                export_content += "Sources:\n"
+            if msg['sources']:
+                export_content.write("Sources:\n")
                 for i, source in enumerate(msg['sources'], 1):
-                    export_content += f"  {i}. {source}\n"
-                export_content += "\n"
+                    export_content.write(f"  {i}. {source}\n")
+                export_content.write("\n")
             
-            export_content += "-" * 30 + "\n\n"
+            export_content.write("-" * 30 + "\n\n")
         
         # Provide download
         st.download_button(
             label="Download as .txt",
-            data=export_content.encode('utf-8'),
+            data=export_content.getvalue().encode('utf-8'),
             file_name=f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
             mime="text/plain"
         )
@@ -948,63 +1190,61 @@ class LawFirmAIApp:
         
         try:
             payload = self._build_chat_payload(message)
-            response = self._make_api_request(payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Debug: Log the response structure
-                logger.info(f"Chat API Response: {result}")
-                
-                # Validate response structure
-                if not isinstance(result, dict):
-                    st.error("Invalid response format from API")
-                    return {"response": "I received an invalid response format. Please try again.", "sources": []}
-                
-                # Ensure sources is always a list
-                if "sources" in result and result["sources"] is None:
-                    result["sources"] = []
-                elif "sources" not in result:
-                    result["sources"] = []
-                
-                # Log successful chat completion
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="CHAT_COMPLETED",
-                    resource="chat_completion",
-                    status="success",
-                    details=f"Response generated successfully. Tokens used: {result.get('usage', {}).get('total_tokens', 'unknown')}. Sources: {len(result.get('sources', []))}",
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    session_id=self.session_id,
-                    severity_level="INFO"
-                )
+            with self._chat_reply_container, st.spinner("Thinking..."):
+                response = self._make_api_request(payload)
+            
+            # Closed on every path, so a stream that fails part-way still
+            # returns its pooled connection
+            with response:
+                if response.status_code == 200:
+                    # Render the answer as it arrives, in an assistant bubble below the
+                    # history; the event stream also fills in the sources and token usage
+                    result = {"sources": [], "usage": {}}
+                    with self._chat_reply_container, st.chat_message("assistant"):
+                        result["response"] = st.write_stream(self._iter_chat_stream(response, result))
+                
+                    # Debug: Log the response structure
+                    logger.info(f"Chat API Response: {result}")
+                
+                    # Log successful chat completion
+                    self.db_manager.log_audit_event(
+                        user_id=current_user['id'] if current_user else None,
+                        username=current_user['username'] if current_user else 'anonymous',
+                        action_type="CHAT_COMPLETED",
+                        resource="chat_completion",
+                        status="success",
+                        details=f"Response generated successfully. Tokens used: {result.get('usage', {}).get('total_tokens', 'unknown')}. Sources: {len(result.get('sources', []))}",
+                        ip_address=ip_address,
+                        user_agent=user_agent,
+                        session_id=self.session_id,
+                        severity_level="INFO"
+                    )
                 
-                return result
-            else:
-                # Log API error
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="CHAT_API_ERROR",
-                    resource="chat_completion",
-                    status="error",
-                    details=f"API Error: {response.status_code} - {response.text}",
-                    ip_address=ip_address,
-                    session_id=self.session_id,
-                    severity_level="ERROR"
-                )
+                    return result
+                else:
+                    # Log API error
+                    error_text = _error_text(response)
+                    self.db_manager.log_audit_event(
+                        user_id=current_user['id'] if current_user else None,
+                        username=current_user['username'] if current_user else 'anonymous',
+                        action_type="CHAT_API_ERROR",
+                        resource="chat_completion",
+                        status="error",
+                        details=f"API Error: {response.status_code} - {error_text}",
+                        ip_address=ip_address,
+                        session_id=self.session_id,
+                        severity_level="ERROR"
+                    )
                 
-                # Return a structured error response instead of None
-                error_message = f"API Error {response.status_code}: Unable to process your request. Please try again."
-                if response.status_code == 503:
-                    error_message = "The AI service is temporarily unavailable. Please try again in a moment."
-                elif response.status_code == 500:
-                    error_message = "An internal server error occurred. Please try again."
+                    # Return a structured error response instead of None
+                    error_message = f"API Error {response.status_code}: Unable to process your request. Please try again."
+                    if response.status_code == 503:
+                        error_message = "The AI service is temporarily unavailable. Please try again in a moment."
+                    elif response.status_code == 500:
+                        error_message = "An internal server error occurred. Please try again."
                 
-                st.error(error_message)
-                return {"response": error_message, "sources": [], "error": True}
+                    st.error(error_message)
+                    return {"response": error_message, "sources": [], "error": True}
                 
         except requests.exceptions.RequestException as error:
             error_str = str(error).lower()
@@ -1107,15 +1347,46 @@ You may need to restart your AI service to continue using the chat feature."""
         return payload
     
     def _make_api_request(self, payload: Dict[str, Any]) -> requests.Response:
-        """Make the actual API request with authentication"""
-        headers = self._get_auth_headers()
-        return requests.post(
-            f"{API_BASE_URL}/api/v1/chat/completions",
-            json=payload,
+        """
+        Open the streaming chat request with authentication; the body is read as it arrives
+        
+        The payload carries the whole conversation, so it is encoded with orjson.
+        """
+        headers = self._get_auth_headers()  # includes Content-Type: application/json
+        return _get_http_session().post(
+            f"{API_BASE_URL}/api/v1/chat/stream",
+            data=orjson.dumps(payload),
             headers=headers,
-            timeout=DEFAULT_TIMEOUT
+            timeout=DEFAULT_TIMEOUT,
+            stream=True
         )
     
+    def _iter_chat_stream(self, response: requests.Response, result: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yield response text from the chat endpoint's Server-Sent Events
+        
+        The sources event is stored in result["sources"] and the token usage from
+        the done event in result["usage"]; an error event raises, so a response
+        interrupted mid-stream is handled like any failed request.
+        """
+        response.encoding = 'utf-8'  # event streams carry no charset, and requests would guess latin-1
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = orjson.loads(line[len("data:"):])
+                if event == "sources":
+                    result["sources"] = data or []
+                elif event == "done":
+                    result["usage"] = data.get("usage") or {}
+                elif event == "error":
+                    raise RuntimeError(data.get("detail", "The response stream failed"))
+                elif event is None:
+                    yield data.get("content", "")
+            elif not line:
+                event = None  # a blank line ends the event
+    
     def render_chat_messages(self):
         """Render chat message history with proper scrolling"""
         # Add CSS for proper chat scrolling
@@ -1162,10 +1433,9 @@ You may need to restart your AI service to continue using the chat feature."""
                     st.success(message["content"])
                     
                     # Show sources if available
-                    if "sources" in message and message["sources"]:
+                    if message["sources"]:
                         with st.expander("View Sources", expanded=False):
-                            for j, source in enumerate(message["sources"], 1):
-                                st.markdown(f"**Source {j}:** {source}")
+                            st.markdown(self._get_sources_markdown(message))
                 
                 # Add separator between messages except for the last one
                 if i < len(st.session_state.messages) - 1:
@@ -1185,19 +1455,18 @@ You may need to restart your AI service to continue using the chat feature."""
     
 
     
-    def _render_user_message(self, content: str):
-        """Legacy method - kept for compatibility"""
-        st.markdown(self._get_user_message_html(content), unsafe_allow_html=True)
-    
-    def _render_assistant_message(self, content: str):
-        """Legacy method - kept for compatibility"""
-        st.markdown(self._get_assistant_message_html(content), unsafe_allow_html=True)
-    
     def _render_sources(self, sources: List[str]):
         """Legacy method - kept for compatibility"""
         with st.expander("View Sources"):
-            for i, source in enumerate(sources, 1):
-                st.markdown(f"**Source {i}:** {source}")
+            st.markdown(self._get_sources_markdown({'sources': sources}))
+    
+    def _get_sources_markdown(self, message: Dict[str, Any]) -> str:
+        """Markdown listing a message's sources, built once and kept on the message for later reruns"""
+        if 'sources_markdown' not in message:
+            message['sources_markdown'] = "\n\n".join(
+                f"**Source {i}:** {source}" for i, source in enumerate(message['sources'], 1)
+            )
+        return message['sources_markdown']
     
     def handle_chat_input(self):
         """Handle chat input and processing"""
@@ -1215,23 +1484,21 @@ You may need to restart your AI service to continue using the chat feature."""
         """Process user input and get AI response"""
         logger.info(f"Processing user input: '{user_input[:100]}...'")
         
-        # Add user message to history
+        # Add user message to history; it is saved together with the reply below
+        first_new_message = len(st.session_state.messages)
         self._add_message_to_history("user", user_input)
         
         # Clear the sending flag since message is now in history
         st.session_state.message_being_sent = False
         
-        # Log user action
-        self.auth_manager.log_user_action("CHAT_MESSAGE", f"User sent message: {user_input[:100]}...")
-        
         logger.info(f"Current conversation history length: {len(st.session_state.messages)}")
         
-        # Send to API and get response
-        with st.spinner("Thinking..."):
+        try:
+            # Send to API and stream the response below the history
             try:
                 response = self.send_chat_message(user_input)
                 logger.info(f"API response received: {type(response)}")
-                
+            
                 if response:
                     # Check if it's an error response (AI service down)
                     if isinstance(response, dict) and response.get("error") == "ai_service_down":
@@ -1244,7 +1511,7 @@ To resolve this issue:
 3. Try sending your message again
 
 Your message has been saved, and I'll be able to respond once the AI service is running again."""
-                        
+                    
                         self._add_message_to_history("assistant", error_message, [])
                     else:
                         # Normal successful response
@@ -1253,36 +1520,34 @@ Your message has been saved, and I'll be able to respond once the AI service is
                     # Handle None response
                     error_message = """I encountered an error while trying to process your message. Please try again, and if the problem persists, check that all services are running properly."""
                     self._add_message_to_history("assistant", error_message, [])
-                    
+                
             except Exception as e:
                 # Catch any unexpected errors in message processing
                 error_message = f"""An unexpected error occurred while processing your message: {str(e)}
                 
 Please try again, and if the problem persists, check that all services are running properly."""
                 self._add_message_to_history("assistant", error_message, [])
-                
+            
                 # Log the error for debugging
                 self.auth_manager.log_user_action("CHAT_PROCESSING_ERROR", f"Error processing message: {str(e)}")
+        finally:
+            # Persist the turn (user message and reply) in one database write
+            self.save_messages_to_current_session(st.session_state.messages[first_new_message:])
         
         # Rerun to show new messages
         logger.info(f"Message processing complete. Total messages: {len(st.session_state.messages)}")
         st.rerun()
     
     def _add_message_to_history(self, role: str, content: str, sources: List[str] = None):
-        """Add a message to the chat history and save to database"""
+        """Add a message to the chat history; _process_user_input saves the turn to the database"""
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "sources": sources or []  # always present, as in messages loaded from the database
         }
         
-        if sources:
-            message["sources"] = sources
-        
         st.session_state.messages.append(message)
-        
-        # Save to database
-        self.save_message_to_current_session(role, content, sources)
     
     def _handle_api_response(self, response: Dict[str, Any]):
         """Handle API response and add to chat history"""
@@ -1303,12 +1568,16 @@ Please try again, and if the problem persists, check that all services are runni
             sources = []
         
         self._add_message_to_history("assistant", assistant_content, sources)
-        
-        # Log successful response
-        self.auth_manager.log_user_action("CHAT_RESPONSE", "Received AI response")
     
+    @st.fragment
     def render_document_selection(self):
-        """Render document selection interface for context filtering"""
+        """
+        Render document selection interface for context filtering
+        
+        Runs as a fragment: changing the selection only stores the chosen IDs
+        for the next chat request, so it reruns this panel instead of
+        re-rendering the whole chat history.
+        """
         # Load documents if not already loaded
         if not st.session_state.documents_uploaded:
             self.load_document_list()
@@ -1318,16 +1587,8 @@ Please try again, and if the problem persists, check that all services are runni
             with st.expander("Document Context Selection", expanded=False):
                 st.markdown("**Select specific documents to use as context for your questions:**")
                 
-                # Create document options for multiselect
-                document_options = {}
-                for doc in st.session_state.documents_uploaded:
-                    doc_id = doc.get('document_id')
-                    filename = doc.get('filename', 'Unknown')
-                    chunk_count = doc.get('chunk_count', 0)
-                    
-                    # Create a user-friendly display name
-                    display_name = f"{filename} ({chunk_count} chunks)"
-                    document_options[display_name] = doc_id
+                # Display name -> document ID, built when the list was loaded
+                document_options = st.session_state.document_options
                 
                 # Multiselect for document selection
                 selected_display_names = st.multiselect(
@@ -1420,6 +1681,9 @@ Please try again, and if the problem persists, check that all services are runni
                         # Force re-render which will trigger auto-scroll
                         st.rerun()
         
+        # A reply being streamed is shown here, below the history it will join
+        self._chat_reply_container = st.container()
+        
         # Action buttons
         if st.session_state.messages:
             col1, col2 = st.columns(2)
@@ -1447,88 +1711,53 @@ Please try again, and if the problem persists, check that all services are runni
         if not uploaded_file:
             return
         
-        # Log document upload initiation
-        self.db_manager.log_audit_event(
+        # One audit event records the final outcome of the upload
+        with self.db_manager.audit_context(
+            action="DOC_UPLOAD",
             user_id=current_user['id'] if current_user else None,
             username=current_user['username'] if current_user else 'anonymous',
-            action_type="DOC_UPLOAD_INITIATED",
             resource=f"document:{uploaded_file.name}",
-            status="initiated",
-            details=f"File size: {uploaded_file.size} bytes, Type: {uploaded_file.type}",
             ip_address=ip_address,
             user_agent=user_agent,
-            session_id=self.session_id,
-            severity_level="INFO"
-        )
-        
-        try:
-            files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-            headers = {"Authorization": "Bearer internal-secret-key"}
-            response = requests.post(
-                f"{API_BASE_URL}/api/v1/documents/upload",
-                files=files,
-                headers=headers,
-                timeout=UPLOAD_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                st.success(f"Document '{uploaded_file.name}' uploaded successfully!")
-                
-                # Log successful upload
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="DOC_UPLOAD_SUCCESS",
-                    resource=f"document:{uploaded_file.name}",
-                    status="success",
-                    details=f"Document ID: {result.get('document_id', 'unknown')}, Chunks: {result.get('chunk_count', 0)}",
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    session_id=self.session_id,
-                    severity_level="INFO"
-                )
-                
-                # Log user action for legacy compatibility
-                self.auth_manager.log_user_action(
-                    "DOCUMENT_UPLOADED", 
-                    f"Uploaded document: {uploaded_file.name}"
-                )
+            session_id=self.session_id
+        ) as audit:
+            try:
+                # Stream the multipart body from the uploaded buffer instead of encoding a full copy
+                uploaded_file.seek(0)
+                encoder = MultipartEncoder(fields={"file": (uploaded_file.name, uploaded_file, uploaded_file.type)})
+                with st.spinner(f"Uploading {uploaded_file.name}..."):
+                    response = _get_http_session().post(
+                        f"{API_BASE_URL}/api/v1/documents/upload",
+                        data=encoder,
+                        headers={**DOCUMENT_API_HEADERS, "Content-Type": encoder.content_type},
+                        timeout=UPLOAD_TIMEOUT
+                    )
                 
-                self.load_document_list()
-            else:
-                error_msg = f"Upload failed: {response.text}"
+                if response.status_code == 200:
+                    result = response.json()
+                    st.success(f"Document '{uploaded_file.name}' uploaded successfully!")
+                    
+                    audit.status = "success"
+                    audit.details = (
+                        f"File size: {uploaded_file.size} bytes, Type: {uploaded_file.type}. "
+                        f"Document ID: {result.get('document_id', 'unknown')}, Chunks: {result.get('chunk_count', 0)}"
+                    )
+                    
+                    self.load_document_list(refresh=True)
+                else:
+                    error_text = _error_text(response)
+                    error_msg = f"Upload failed: {error_text}"
+                    st.error(error_msg)
+                    
+                    audit.status = "failure"
+                    audit.details = f"Upload failed: {response.status_code} - {error_text}"
+                    
+            except Exception as error:
+                error_msg = f"Error uploading document: {str(error)}"
                 st.error(error_msg)
                 
-                # Log upload failure
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="DOC_UPLOAD_FAILED",
-                    resource=f"document:{uploaded_file.name}",
-                    status="failure",
-                    details=f"Upload failed: {response.status_code} - {response.text}",
-                    ip_address=ip_address,
-                    session_id=self.session_id,
-                    severity_level="WARNING"
-                )
-                
-        except Exception as error:
-            error_msg = f"Error uploading document: {str(error)}"
-            st.error(error_msg)
-            
-            # Log upload error
-            self.db_manager.log_audit_event(
-                user_id=current_user['id'] if current_user else None,
-                username=current_user['username'] if current_user else 'anonymous',
-                action_type="DOC_UPLOAD_ERROR",
-                resource=f"document:{uploaded_file.name}",
-                status="error",
-                details=f"Upload error: {str(error)}",
-                ip_address=ip_address,
-                session_id=self.session_id,
-                severity_level="ERROR"
-            )
+                audit.status = "error"
+                audit.details = f"Upload error: {str(error)}"
     
     def _show_delete_confirmation(self):
         """Show confirmation dialog for document deletion"""
@@ -1651,79 +1880,44 @@ Please try again, and if the problem persists, check that all services are runni
         current_user = self.auth_manager.get_current_user()
         ip_address = self._get_client_ip()
         
-        # Log document deletion attempt
-        self.db_manager.log_audit_event(
+        # One audit event records the final outcome of the deletion
+        with self.db_manager.audit_context(
+            action="DOC_DELETE",
             user_id=current_user['id'] if current_user else None,
             username=current_user['username'] if current_user else 'anonymous',
-            action_type="DOC_DELETE_INITIATED",
             resource=f"document:{filename}",
-            status="initiated",
-            details=f"Document ID: {document_id}",
             ip_address=ip_address,
-            session_id=self.session_id,
-            severity_level="INFO"
-        )
-        
-        try:
-            headers = {"Authorization": "Bearer internal-secret-key"}
-            response = requests.delete(f"{API_BASE_URL}/api/v1/documents/{document_id}", headers=headers)
-            
-            if response.status_code == 200:
-                st.success(f"Document '{filename}' deleted successfully!")
-                
-                # Log successful deletion
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="DOC_DELETE_SUCCESS",
-                    resource=f"document:{filename}",
-                    status="success",
-                    details=f"Document successfully deleted. ID: {document_id}",
-                    ip_address=ip_address,
-                    session_id=self.session_id,
-                    severity_level="INFO"
-                )
+            session_id=self.session_id
+        ) as audit:
+            try:
+                with st.spinner(f"Deleting {filename}..."):
+                    response = _get_http_session().delete(
+                        f"{API_BASE_URL}/api/v1/documents/{document_id}",
+                        headers=DOCUMENT_API_HEADERS,
+                        timeout=DEFAULT_TIMEOUT
+                    )
                 
-                # Legacy audit logging
-                self.auth_manager.log_user_action(
-                    "DOCUMENT_DELETED", 
-                    f"Deleted document: {filename}"
-                )
-                
-                self.load_document_list()
-            else:
-                error_msg = f"Failed to delete document: {response.text}"
+                if response.status_code == 200:
+                    st.success(f"Document '{filename}' deleted successfully!")
+                    
+                    audit.status = "success"
+                    audit.details = f"Document successfully deleted. ID: {document_id}"
+                    
+                    self.load_document_list(refresh=True)
+                else:
+                    error_text = _error_text(response)
+                    error_msg = f"Failed to delete document: {error_text}"
+                    st.error(error_msg)
+                    
+                    audit.status = "failure"
+                    audit.details = f"Deletion failed: {response.status_code} - {error_text}"
+                    
+            except Exception as error:
+                error_msg = f"Error deleting document: {str(error)}"
                 st.error(error_msg)
                 
-                # Log deletion failure
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="DOC_DELETE_FAILED",
-                    resource=f"document:{filename}",
-                    status="failure",
-                    details=f"Deletion failed: {response.status_code} - {response.text}",
-                    ip_address=ip_address,
-                    session_id=self.session_id,
-                    severity_level="WARNING"
-                )
-                
-        except Exception as error:
-            error_msg = f"Error deleting document: {str(error)}"
-            st.error(error_msg)
-            
-            # Log deletion error
-            self.db_manager.log_audit_event(
-                user_id=current_user['id'] if current_user else None,
-                username=current_user['username'] if current_user else 'anonymous',
-                action_type="DOC_DELETE_ERROR",
-                resource=f"document:{filename}",
-                status="error",
-                details=f"Deletion error: {str(error)}",
-                ip_address=ip_address,
-                session_id=self.session_id,
-                severity_level="ERROR"
-            )
+                audit.status = "error"
+                audit.details = f"Deletion error: {str(error)}"
 
     def delete_document(self, document_id: str, filename: str):
         """Initiate document deletion with confirmation dialog"""
@@ -1740,105 +1934,67 @@ Please try again, and if the problem persists, check that all services are runni
         ip_address = self._get_client_ip()
         user_agent = self._get_user_agent()
         
-        # Log document download initiation
-        self.db_manager.log_audit_event(
+        # One audit event records the final outcome of the download
+        with self.db_manager.audit_context(
+            action="DOC_DOWNLOAD",
             user_id=current_user['id'] if current_user else None,
             username=current_user['username'] if current_user else 'anonymous',
-            action_type="DOC_DOWNLOAD_INITIATED",
             resource=f"document:{filename}",
-            status="initiated",
-            details=f"Document download initiated for ID: {document_id}",
             ip_address=ip_address,
             user_agent=user_agent,
-            session_id=self.session_id,
-            severity_level="INFO"
-        )
-        
-        try:
-            with st.spinner(f"Preparing {filename} for download..."):
-                response = requests.get(
-                    f"{API_BASE_URL}/api/v1/documents/download/{document_id}",
-                    timeout=30
-                )
-            
-            if response.status_code == 200:
-                # Log successful download preparation
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="DOC_DOWNLOAD_SUCCESS",
-                    resource=f"document:{filename}",
-                    status="success",
-                    details=f"Document download prepared successfully. Size: {len(response.content)} bytes",
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    session_id=self.session_id,
-                    severity_level="INFO"
-                )
-                
-                # Log user action for legacy compatibility
-                self.auth_manager.log_user_action(
-                    "DOCUMENT_DOWNLOADED", 
-                    f"Downloaded document: {filename}"
-                )
-                
-                # Store download data in session state
-                st.session_state.pending_download = {
-                    'filename': filename,
-                    'content': response.content,
-                    'document_id': document_id
-                }
-                
-                st.success(f"Document '{filename}' is ready for download!")
-                st.rerun()
+            session_id=self.session_id
+        ) as audit:
+            try:
+                with st.spinner(f"Preparing {filename} for download..."):
+                    response = _get_http_session().get(
+                        f"{API_BASE_URL}/api/v1/documents/download/{document_id}",
+                        headers=DOCUMENT_API_HEADERS,
+                        timeout=30
+                    )
                 
-            else:
-                error_msg = f"Download failed: {response.text}"
+                if response.status_code == 200:
+                    audit.status = "success"
+                    audit.details = f"Document download prepared successfully. ID: {document_id}, Size: {len(response.content)} bytes"
+                    
+                    # Store download data in session state
+                    st.session_state.pending_download = {
+                        'filename': filename,
+                        'content': response.content,
+                        'document_id': document_id
+                    }
+                    
+                    st.success(f"Document '{filename}' is ready for download!")
+                    st.rerun()
+                    
+                else:
+                    error_text = _error_text(response)
+                    error_msg = f"Download failed: {error_text}"
+                    st.error(error_msg)
+                    
+                    audit.status = "failure"
+                    audit.details = f"Download failed: {response.status_code} - {error_text}"
+                    
+            except Exception as error:
+                error_msg = f"Error downloading document: {str(error)}"
                 st.error(error_msg)
                 
-                # Log download failure
-                self.db_manager.log_audit_event(
-                    user_id=current_user['id'] if current_user else None,
-                    username=current_user['username'] if current_user else 'anonymous',
-                    action_type="DOC_DOWNLOAD_FAILED",
-                    resource=f"document:{filename}",
-                    status="failure",
-                    details=f"Download failed: {response.status_code} - {response.text}",
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    session_id=self.session_id,
-                    severity_level="WARNING"
-                )
-                
-        except Exception as error:
-            error_msg = f"Error downloading document: {str(error)}"
-            st.error(error_msg)
-            
-            # Log download error
-            self.db_manager.log_audit_event(
-                user_id=current_user['id'] if current_user else None,
-                username=current_user['username'] if current_user else 'anonymous',
-                action_type="DOC_DOWNLOAD_ERROR",
-                resource=f"document:{filename}",
-                status="error",
-                details=f"Download error: {str(error)}",
-                ip_address=ip_address,
-                user_agent=user_agent,
-                session_id=self.session_id,
-                severity_level="ERROR"
-            )
+                audit.status = "error"
+                audit.details = f"Download error: {str(error)}"
     
-    def load_document_list(self):
-        """Load the list of uploaded documents"""
+    def load_document_list(self, refresh: bool = False):
+        """Load the list of uploaded documents; refresh bypasses the shared cache after a change"""
+        if refresh:
+            _fetch_document_list.clear()
         try:
-            headers = {"Authorization": "Bearer internal-secret-key"}
-            response = requests.get(f"{API_BASE_URL}/api/v1/documents/list", headers=headers)
-            if response.status_code == 200:
-                result = response.json()
-                st.session_state.documents_uploaded = result.get("documents", [])
-            else:
-                st.error("Failed to load document list")
-                
+            documents = _fetch_document_list()
+            st.session_state.documents_uploaded = documents
+            # Multiselect options for document context selection, with user-friendly display names
+            st.session_state.document_options = {
+                f"{doc.get('filename', 'Unknown')} ({doc.get('chunk_count', 0)} chunks)": doc.get('document_id')
+                for doc in documents
+            }
+        except requests.HTTPError:
+            st.error("Failed to load document list")
         except Exception as error:
             st.error(f"Error loading documents: {str(error)}")
     
@@ -1858,7 +2014,7 @@ Please try again, and if the problem persists, check that all services are runni
             if st.button("Refresh Documents", 
                         help="Refresh document list", 
                         use_container_width=True):
-                self.load_document_list()
+                self.load_document_list(refresh=True)
                 st.rerun()
         
         # Upload section
@@ -1931,69 +2087,137 @@ Please try again, and if the problem persists, check that all services are runni
         else:
             st.info("No documents uploaded yet. Upload a PDF to get started.")
     
+    @st.fragment
     def render_analytics_dashboard(self):
-        """Render analytics dashboard"""
+        """Render analytics dashboard; runs as a fragment so refreshing it leaves the rest of the page alone"""
         # Header with refresh button
         col1, col2 = st.columns([4, 1])
         with col1:
             st.header("Analytics Dashboard")
         with col2:
             st.markdown("<br>", unsafe_allow_html=True)  # Add spacing to align with header
-            if st.button("Refresh Analytics", 
-                        help="Refresh analytics data", 
-                        use_container_width=True):
-                # Clear cached data and reload
-                if 'analytics_data' in st.session_state:
-                    del st.session_state['analytics_data']
-                st.rerun()
-        
-        # System metrics
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown("""
-            <div class="metric-card">
-                <div class="metric-value">{}</div>
-                <div class="metric-label">Total Messages</div>
-            </div>
-            """.format(len(st.session_state.messages)), unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class="metric-card">
-                <div class="metric-value">{}</div>
-                <div class="metric-label">Documents Uploaded</div>
-            </div>
-            """.format(len(st.session_state.documents_uploaded)), unsafe_allow_html=True)
-        
-        with col3:
-            api_status_text = "Online" if st.session_state.api_status == "online" else "Offline"
-            st.markdown("""
-            <div class="metric-card">
-                <div class="metric-value status-{}">{}</div>
-                <div class="metric-label">API Status</div>
-            </div>
-            """.format(st.session_state.api_status, api_status_text), unsafe_allow_html=True)
+            # Clicking reruns only this fragment, which re-reads the metrics
+            st.button("Refresh Analytics", 
+                      help="Refresh analytics data", 
+                      use_container_width=True)
+        
+        # System metrics, emitted as a single element
+        api_status_text = "Online" if st.session_state.api_status == "online" else "Offline"
+        metric_cards = (
+            (len(st.session_state.messages), "Total Messages", ""),
+            (len(st.session_state.documents_uploaded), "Documents Uploaded", ""),
+            (api_status_text, "API Status", f" status-{st.session_state.api_status}")
+        )
+        st.markdown(
+            '<div class="metric-grid">' + "".join(
+                METRIC_CARD_HTML.format(value=value, label=label, value_class=value_class)
+                for value, label, value_class in metric_cards
+            ) + '</div>',
+            unsafe_allow_html=True
+        )
         
         # Recent activity
         st.subheader("Recent Activity")
-        recent_messages = st.session_state.messages[-5:] if st.session_state.messages else []
-        
-        if recent_messages:
-            for msg in reversed(recent_messages):
-                timestamp = datetime.fromisoformat(msg['timestamp']).strftime("%Y-%m-%d %H:%M")
+        if st.session_state.messages:
+            for msg in islice(reversed(st.session_state.messages), 5):
+                timestamp = _format_timestamp(msg.get('timestamp', ''))
                 role = "User" if msg['role'] == 'user' else "Assistant"
                 content_preview = msg['content'][:100] + "..." if len(msg['content']) > 100 else msg['content']
                 
-                st.markdown(f"""
-                <div class="info-card">
-                    <strong>{timestamp} - {role}:</strong><br>
-                    {content_preview}
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(
+                    ACTIVITY_CARD_HTML.format(timestamp=timestamp, role=role, content=content_preview),
+                    unsafe_allow_html=True
+                )
         else:
             st.info("No recent activity to display.")
     
+    def _fetch_audit_page(self, filter_key: tuple, query_filters: Dict[str, Any], page_size: int,
+                          seek: Dict[str, Any]) -> tuple:
+        """
+        Fetch one audit page, reusing the total count while paging with unchanged filters
+        
+        The count is recomputed when the filters change, after VIEW_CACHE_TTL, or
+        when the view data is invalidated (Refresh Logs, Apply/Clear Filters).
+        """
+        total = st.session_state.get('audit_total_count')
+        known_total = (
+            total['count']
+            if total and total['key'] == filter_key and time.monotonic() - total['cached_at'] < VIEW_CACHE_TTL
+            else None
+        )
+        
+        logs, total_count = self.db_manager.get_audit_logs_filtered(
+            page=st.session_state.audit_filters['page'],
+            page_size=page_size,
+            before=seek.get('before'),
+            after=seek.get('after'),
+            include_total=known_total is None,
+            **query_filters
+        )
+        if known_total is not None:
+            return logs, known_total
+        
+        st.session_state.audit_total_count = {
+            'key': filter_key,
+            'count': total_count,
+            'cached_at': time.monotonic()
+        }
+        return logs, total_count
+    
+    def _go_to_audit_page(self, page: int, seek: Optional[Dict[str, Any]] = None):
+        """Pagination callback; seek carries the boundary row for Next/Previous"""
+        st.session_state.audit_filters['page'] = page
+        if seek:
+            st.session_state.audit_seek = {'page': page, **seek}
+        else:
+            st.session_state.pop('audit_seek', None)
+    
+    def _apply_audit_filters(self):
+        """Filter form callback: apply the submitted filter values"""
+        for key in AUDIT_FILTER_WIDGET_KEYS:
+            st.session_state.audit_filters[key] = st.session_state[f"audit_filter_{key}"]
+        self._invalidate_view_data('audit')
+        self._go_to_audit_page(1)
+    
+    def _clear_audit_filters(self):
+        """Filter form callback: reset the filters and their widgets"""
+        for key in AUDIT_FILTER_WIDGET_KEYS:
+            st.session_state.audit_filters[key] = None if key.startswith('date_') else ''
+            st.session_state[f"audit_filter_{key}"] = st.session_state.audit_filters[key]
+        self._invalidate_view_data('audit')
+        self._go_to_audit_page(1)
+    
+    def _get_view_data(self, view: str, cache_key: Any, fetch: Callable[[], Any]) -> Any:
+        """
+        Session-scoped write-through cache for the data a view renders
+        
+        The cached result is reused while cache_key is unchanged and younger than
+        VIEW_CACHE_TTL, so switching views and back does not repeat the query.
+        """
+        entry = st.session_state.get(f'{view}_view_cache')
+        if entry and entry['key'] == cache_key and time.monotonic() - entry['cached_at'] < VIEW_CACHE_TTL:
+            return entry['data']
+        
+        data = fetch()
+        st.session_state[f'{view}_view_cache'] = {
+            'key': cache_key,
+            'data': data,
+            'cached_at': time.monotonic()
+        }
+        return data
+    
+    def _invalidate_view_data(self, view: str):
+        """Drop a view's cached data (and any cached total count) so its next render queries again"""
+        st.session_state.pop(f'{view}_view_cache', None)
+        st.session_state.pop(f'{view}_total_count', None)
+    
+    def _get_audit_query_filters(self) -> Dict[str, str]:
+        """Audit filters as database query arguments, with dates as ISO strings"""
+        query_filters = {k: v for k, v in st.session_state.audit_filters.items() if k != 'page'}
+        for key in ('date_from', 'date_to'):
+            query_filters[key] = query_filters[key].isoformat() if query_filters[key] else ''
+        return query_filters
+    
     def render_advanced_audit_logs(self):
         """Render advanced audit logs viewer with filters and export"""
         current_user = self.auth_manager.get_current_user()
@@ -2003,18 +2227,21 @@ Please try again, and if the problem persists, check that all services are runni
         
         st.header("Advanced Audit Logs")
         
-        # Log access to audit logs
-        self.db_manager.log_audit_event(
-            user_id=current_user['id'],
-            username=current_user['username'],
-            action_type="AUDIT_LOG_ACCESS",
-            resource="audit_logs",
-            status="success",
-            details="Admin accessed audit log viewer",
-            ip_address=self._get_client_ip(),
-            session_id=self.session_id,
-            severity_level="INFO"
-        )
+        client_ip = self._get_client_ip()
+        
+        # Log access once per visit, not on every rerun within the viewer
+        if self._entered_view:
+            self.db_manager.log_audit_event(
+                user_id=current_user['id'],
+                username=current_user['username'],
+                action_type="AUDIT_LOG_ACCESS",
+                resource="audit_logs",
+                status="success",
+                details="Admin accessed audit log viewer",
+                ip_address=client_ip,
+                session_id=self.session_id,
+                severity_level="INFO"
+            )
         
         # Initialize filter state
         if 'audit_filters' not in st.session_state:
@@ -2023,215 +2250,228 @@ Please try again, and if the problem persists, check that all services are runni
                 'username': '',
                 'status': '',
                 'severity_level': '',
-                'date_from': '',
-                'date_to': '',
+                'date_from': None,
+                'date_to': None,
                 'page': 1
             }
         
-        # Filters Section
+        # Filters Section: widgets live in a form so editing them does not rerun
+        # the page; the submit callbacks update the applied filters
+        for key in AUDIT_FILTER_WIDGET_KEYS:
+            if f"audit_filter_{key}" not in st.session_state:
+                st.session_state[f"audit_filter_{key}"] = st.session_state.audit_filters[key]
+        
         with st.expander("Filter Options", expanded=True):
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                action_types = ['', 'LOGIN', 'CHAT', 'DOC_UPLOAD', 'DOC_DELETE', 'PASSWORD', 'USER_CREATE', 'AUDIT']
-                st.session_state.audit_filters['action_type'] = st.selectbox(
-                    "Action Type",
-                    action_types,
-                    index=action_types.index(st.session_state.audit_filters['action_type']) if st.session_state.audit_filters['action_type'] in action_types else 0
-                )
+            with st.form("audit_filters_form", border=False):
+                col1, col2, col3 = st.columns(3)
                 
-                st.session_state.audit_filters['username'] = st.text_input(
-                    "Username",
-                    value=st.session_state.audit_filters['username'],
-                    placeholder="Search by username..."
-                )
-            
-            with col2:
-                statuses = ['', 'success', 'failure', 'error', 'initiated']
-                st.session_state.audit_filters['status'] = st.selectbox(
-                    "Status",
-                    statuses,
-                    index=statuses.index(st.session_state.audit_filters['status']) if st.session_state.audit_filters['status'] in statuses else 0
-                )
+                with col1:
+                    st.selectbox("Action Type", AUDIT_ACTION_TYPES, key="audit_filter_action_type")
+                    
+                    st.text_input(
+                        "Username",
+                        key="audit_filter_username",
+                        placeholder="Search by username..."
+                    )
                 
-                severity_levels = ['', 'INFO', 'WARNING', 'ERROR']
-                st.session_state.audit_filters['severity_level'] = st.selectbox(
-                    "Severity Level",
-                    severity_levels,
-                    index=severity_levels.index(st.session_state.audit_filters['severity_level']) if st.session_state.audit_filters['severity_level'] in severity_levels else 0
-                )
-            
-            with col3:
-                st.session_state.audit_filters['date_from'] = st.date_input(
-                    "Date From",
-                    value=date.fromisoformat(st.session_state.audit_filters['date_from']) if st.session_state.audit_filters['date_from'] else None
-                )
-                if st.session_state.audit_filters['date_from']:
-                    st.session_state.audit_filters['date_from'] = str(st.session_state.audit_filters['date_from'])
-                else:
-                    st.session_state.audit_filters['date_from'] = ''
+                with col2:
+                    st.selectbox("Status", AUDIT_STATUSES, key="audit_filter_status")
+                    
+                    st.selectbox("Severity Level", AUDIT_SEVERITY_LEVELS, key="audit_filter_severity_level")
                 
-                st.session_state.audit_filters['date_to'] = st.date_input(
-                    "Date To",
-                    value=date.fromisoformat(st.session_state.audit_filters['date_to']) if st.session_state.audit_filters['date_to'] else None
-                )
-                if st.session_state.audit_filters['date_to']:
-                    st.session_state.audit_filters['date_to'] = str(st.session_state.audit_filters['date_to'])
-                else:
-                    st.session_state.audit_filters['date_to'] = ''
-            
-            # Action buttons
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button("Apply Filters", use_container_width=True):
-                    st.session_state.audit_filters['page'] = 1
-                    st.rerun()
+                with col3:
+                    st.date_input("Date From", key="audit_filter_date_from")
+                    st.date_input("Date To", key="audit_filter_date_to")
+                
+                # Action buttons
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.form_submit_button(
+                        "Apply Filters",
+                        use_container_width=True,
+                        on_click=self._apply_audit_filters
+                    )
+                
+                with col2:
+                    st.form_submit_button(
+                        "Clear Filters",
+                        use_container_width=True,
+                        on_click=self._clear_audit_filters
+                    )
             
-            with col2:
-                if st.button("Clear Filters", use_container_width=True):
-                    st.session_state.audit_filters = {
-                        'action_type': '',
-                        'username': '',
-                        'status': '',
-                        'severity_level': '',
-                        'date_from': '',
-                        'date_to': '',
-                        'page': 1
-                    }
-                    st.rerun()
+            # Query arguments for the current filters, shared by the export and its audit entry
+            query_filters = self._get_audit_query_filters()
             
-            with col3:
+            export_col = st.columns(3)[2]
+            with export_col:
                 if st.button("Export CSV", use_container_width=True):
-                    csv_data = self.db_manager.export_audit_logs_csv(st.session_state.audit_filters)
-                    if csv_data:
+                    # Stream the export into a buffer chunk by chunk instead of
+                    # materializing the full result set as one string
+                    csv_buffer = io.BytesIO()
+                    try:
+                        for chunk in self.db_manager.export_audit_logs_csv(query_filters):
+                            csv_buffer.write(chunk)
+                    except Exception as error:
+                        export_error = error
+                        st.error(f"Audit log export failed: {error}")
+                    else:
+                        export_error = None
+                        csv_buffer.seek(0)
                         st.download_button(
                             label="Download CSV",
-                            data=csv_data,
+                            data=csv_buffer,
                             file_name=f"audit_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                             mime="text/csv",
                             use_container_width=True
                         )
-                        
-                        # Log export action
-                        self.db_manager.log_audit_event(
-                            user_id=current_user['id'],
-                            username=current_user['username'],
-                            action_type="AUDIT_LOG_EXPORT",
-                            resource="audit_logs",
-                            status="success",
-                            details=f"Exported audit logs with filters: {json.dumps(st.session_state.audit_filters)}",
-                            ip_address=self._get_client_ip(),
-                            session_id=self.session_id,
-                            severity_level="INFO"
-                        )
+                    
+                    # Log export action, recording a failed export as such
+                    self.db_manager.log_audit_event(
+                        user_id=current_user['id'],
+                        username=current_user['username'],
+                        action_type="AUDIT_LOG_EXPORT",
+                        resource="audit_logs",
+                        status="failure" if export_error else "success",
+                        details=(
+                            f"Audit log export failed: {export_error}. Filters: {json.dumps(query_filters)}"
+                            if export_error else
+                            f"Exported audit logs with filters: {json.dumps(query_filters)}"
+                        ),
+                        ip_address=client_ip,
+                        session_id=self.session_id,
+                        severity_level="WARNING" if export_error else "INFO"
+                    )
+        
+        self._render_audit_log_page()
+        
+        # Real-time refresh option
+        st.markdown("---")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Refresh Logs", use_container_width=True):
+                self._invalidate_view_data('audit')
+                st.rerun()
         
-        # Get filtered logs
+        with col2:
+            auto_refresh = st.checkbox("Auto-refresh (30s)", value=False)
+            if auto_refresh:
+                # Browser-scheduled rerun; does not hold the script thread while waiting
+                st_autorefresh(interval=30000, limit=None, key="audit_log_refresh")
+
+    @st.fragment
+    def _render_audit_log_page(self):
+        """
+        Render one page of audit logs with its pagination controls
+        
+        Runs as a fragment, so paging reruns only the log list; applying
+        filters or exporting reruns the whole viewer.
+        """
+        # Get filtered logs, seeking from the neighbouring page's boundary row
+        # when Next/Previous was used to reach this page
         page_size = 25
-        logs, total_count = self.db_manager.get_audit_logs_filtered(
-            page=st.session_state.audit_filters['page'],
-            page_size=page_size,
-            **{k: v for k, v in st.session_state.audit_filters.items() if k != 'page'}
+        query_filters = self._get_audit_query_filters()
+        seek = st.session_state.get('audit_seek') or {}
+        if seek.get('page') != st.session_state.audit_filters['page']:
+            seek = {}
+        # Auto-refresh ticks change the component value and force a new query
+        filter_key = (tuple(query_filters.items()), st.session_state.get('audit_log_refresh'))
+        with st.spinner("Loading audit logs..."):
+            logs, total_count = self._get_view_data(
+                'audit',
+                (filter_key, st.session_state.audit_filters['page'], seek.get('before'), seek.get('after')),
+                lambda: self._fetch_audit_page(filter_key, query_filters, page_size, seek)
+            )
+        page_bounds = (
+            ((logs[0]['timestamp'], logs[0]['id']), (logs[-1]['timestamp'], logs[-1]['id']))
+            if logs else (None, None)
         )
         
         # Display pagination info
         total_pages = (total_count + page_size - 1) // page_size
         st.markdown(f"**Showing page {st.session_state.audit_filters['page']} of {total_pages} ({total_count} total records)**")
         
-        # Pagination controls
+        # Pagination controls: callbacks set the page before the next run, so
+        # each click costs a single rerun
         if total_pages > 1:
+            current_page = st.session_state.audit_filters['page']
             col1, col2, col3, col4, col5 = st.columns(5)
             
             with col1:
-                if st.button("First", disabled=st.session_state.audit_filters['page'] == 1):
-                    st.session_state.audit_filters['page'] = 1
-                    st.rerun()
+                st.button(
+                    "First",
+                    disabled=current_page == 1,
+                    on_click=self._go_to_audit_page,
+                    args=(1,)
+                )
             
             with col2:
-                if st.button("Previous", disabled=st.session_state.audit_filters['page'] == 1):
-                    st.session_state.audit_filters['page'] -= 1
-                    st.rerun()
+                st.button(
+                    "Previous",
+                    disabled=current_page == 1,
+                    on_click=self._go_to_audit_page,
+                    args=(current_page - 1, {'after': page_bounds[0]})
+                )
             
             with col3:
-                new_page = st.number_input(
+                st.session_state.audit_page_input = min(current_page, total_pages)
+                st.number_input(
                     "Page",
                     min_value=1,
                     max_value=total_pages,
-                    value=st.session_state.audit_filters['page'],
-                    step=1
+                    step=1,
+                    key="audit_page_input",
+                    on_change=lambda: self._go_to_audit_page(st.session_state.audit_page_input)
                 )
-                if new_page != st.session_state.audit_filters['page']:
-                    st.session_state.audit_filters['page'] = new_page
-                    st.rerun()
             
             with col4:
-                if st.button("Next", disabled=st.session_state.audit_filters['page'] == total_pages):
-                    st.session_state.audit_filters['page'] += 1
-                    st.rerun()
+                st.button(
+                    "Next",
+                    disabled=current_page == total_pages,
+                    on_click=self._go_to_audit_page,
+                    args=(current_page + 1, {'before': page_bounds[1]})
+                )
             
             with col5:
-                if st.button("Last", disabled=st.session_state.audit_filters['page'] == total_pages):
-                    st.session_state.audit_filters['page'] = total_pages
-                    st.rerun()
+                st.button(
+                    "Last",
+                    disabled=current_page == total_pages,
+                    on_click=self._go_to_audit_page,
+                    args=(total_pages,)
+                )
         
         # Display logs
         if logs:
-            for log in logs:
-                # Status indicators (text-based, no emojis)
-                status_indicators = {
-                    'success': '[SUCCESS]',
-                    'failure': '[FAILED]',
-                    'error': '[ERROR]',
-                    'initiated': '[INITIATED]'
-                }
-                status_indicator = status_indicators.get(log['status'], '[INFO]')
-                
-                timestamp = datetime.fromisoformat(log['timestamp']).strftime('%Y-%m-%d %H:%M:%S') if log['timestamp'] else 'Unknown'
-                
-                # Create a clean text-based display
-                log_text = f"**{status_indicator} {log['action_type']}** - {timestamp}\n"
-                log_text += f"User: {log['username']} | Status: {log['status']} | Severity: {log['severity_level']}\n"
-                
-                if log['resource']:
-                    log_text += f"Resource: {log['resource']}\n"
-                if log['ip_address']:
-                    log_text += f"IP: {log['ip_address']}\n"
-                if log['content_hash']:
-                    log_text += f"Content Hash: {log['content_hash']}\n"
-                if log['session_id']:
-                    log_text += f"Session: {log['session_id'][:8]}...\n"
-                if log['details']:
-                    log_text += f"Details: {log['details']}\n"
-                
-                # Use colored containers based on severity
-                if log['severity_level'] == 'ERROR':
-                    st.error(log_text)
-                elif log['severity_level'] == 'WARNING':
-                    st.warning(log_text)
-                else:
-                    st.info(log_text)
-                
-                st.markdown("---")
+            # Project the page onto the display columns and format them column-wise
+            logs_df = pd.DataFrame.from_records(logs, columns=list(AUDIT_TABLE_COLUMNS))
+            logs_df = logs_df.fillna('').rename(columns=AUDIT_TABLE_COLUMNS)
+            logs_df['Time'] = logs_df['Time'].str.slice(0, 19).str.replace('T', ' ', regex=False).replace('', 'Unknown')
+            logs_df['Status'] = logs_df['Status'].map(STATUS_INDICATORS).fillna('[INFO]')
+            logs_df['Session'] = (logs_df['Session'].str.slice(0, 8) + '...').where(logs_df['Session'] != '', '')
+            
+            # Colour rows by severity, as the per-log alert boxes used to
+            def _severity_style(row):
+                return [SEVERITY_ROW_STYLES.get(row['Severity'], '')] * len(row)
+            
+            st.dataframe(
+                logs_df.style.apply(_severity_style, axis=1),
+                hide_index=True,
+                use_container_width=True
+            )
         else:
             st.info("No audit logs found matching the current filters.")
-        
-        # Real-time refresh option
-        st.markdown("---")
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Refresh Logs", use_container_width=True):
-                st.rerun()
-        
-        with col2:
-            auto_refresh = st.checkbox("Auto-refresh (30s)", value=False)
-            if auto_refresh:
-                import time
-                time.sleep(30)
-                st.rerun()
-
+    
     def render_audit_logs(self):
         """Legacy audit logs method - redirect to advanced viewer"""
         self.render_advanced_audit_logs()
     
+    def _get_users(self) -> List[Dict[str, Any]]:
+        """Get active users through the short-lived user list cache"""
+        return _get_users_cached(self.db_manager, st.session_state.users_version)
+    
+    def _invalidate_users(self):
+        """Invalidate the cached user list after a user mutation"""
+        st.session_state.users_version += 1
+    
     def render_user_management(self):
         """Render comprehensive user management interface (Admin Only)"""
         if not self.auth_manager.check_admin_access("manage users"):
@@ -2239,35 +2479,8 @@ Please try again, and if the problem persists, check that all services are runni
         
         current_user = self.auth_manager.get_current_user()
         
-        # Beautiful header with gradient background
-        st.markdown("""
-        <style>
-        .management-header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 16px;
-            padding: 32px;
-            margin: 16px 0;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            text-align: center;
-        }
-        
-        .header-title {
-            color: white;
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin-bottom: 12px;
-        }
-        
-        .header-subtitle {
-            color: rgba(255, 255, 255, 0.9);
-            font-size: 1.2rem;
-            font-weight: 400;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
+        # Styles for every tab, emitted once per run with the header
+        st.markdown(USER_MANAGEMENT_CSS, unsafe_allow_html=True)
         st.markdown("""
         <div class="management-header">
             <div class="header-title">User Management</div>
@@ -2275,18 +2488,19 @@ Please try again, and if the problem persists, check that all services are runni
         </div>
         """, unsafe_allow_html=True)
         
-        # Log access to user management
-        self.db_manager.log_audit_event(
-            user_id=current_user['id'],
-            username=current_user['username'],
-            action_type="USER_MANAGEMENT_ACCESS",
-            resource="user_management",
-            status="success",
-            details="Admin accessed user management interface",
-            ip_address=self._get_client_ip(),
-            session_id=self.session_id,
-            severity_level="INFO"
-        )
+        # Log access once per visit, not on every rerun within the interface
+        if self._entered_view:
+            self.db_manager.log_audit_event(
+                user_id=current_user['id'],
+                username=current_user['username'],
+                action_type="USER_MANAGEMENT_ACCESS",
+                resource="user_management",
+                status="success",
+                details="Admin accessed user management interface",
+                ip_address=self._get_client_ip(),
+                session_id=self.session_id,
+                severity_level="INFO"
+            )
         
         # User management tabs
         tab1, tab2, tab3 = st.tabs(["Manage Users", "Add User", "User Statistics"])
@@ -2300,292 +2514,157 @@ Please try again, and if the problem persists, check that all services are runni
         with tab3:
             self._render_user_statistics()
     
+    def _open_user_action(self, user_id: int, kind: str):
+        """Button callback: open the role change or delete panel for a user; only one is open at a time"""
+        st.session_state.user_action = (user_id, kind)
+    
+    def _close_user_action(self):
+        """Button callback: close the open role change or delete panel"""
+        st.session_state.user_action = None
+    
     def _render_users_list(self):
-        """Render the users list with management actions in beautiful card format"""
-        # Add custom CSS for beautiful user cards
-        st.markdown("""
-        <style>
-        .user-card {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 16px;
-            padding: 24px;
-            margin: 12px 0;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            transition: all 0.3s ease;
-        }
-        
-        .user-card:hover {
-            transform: translateY(-4px);
-            box-shadow: 0 12px 40px rgba(0, 0, 0, 0.15);
-        }
+        """Render the users list as a single selectable table with management actions"""
+        st.subheader("Current Users")
         
-        .admin-card {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        }
+        # Resolve the acting admin and client IP once per render instead of per row
+        current_admin = self.auth_manager.get_current_user()
+        current_admin_name = current_admin['username']
+        client_ip = self._get_client_ip()
+        locked_threshold = self.auth_manager.max_failed_attempts
         
-        .user-normal-card {
-            background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-        }
+        users = self._get_users()
         
-        .locked-card {
-            background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%);
-        }
-        
-        .user-header {
-            color: white;
-            font-size: 1.3rem;
-            font-weight: 600;
-            margin-bottom: 8px;
-        }
+        if not users:
+            st.info("No users found.")
+            return
         
-        .user-info {
-            color: rgba(255, 255, 255, 0.9);
-            font-size: 0.9rem;
-            margin-bottom: 4px;
-        }
+        # One table for all users instead of a column/button block per row
+        users_df = pd.DataFrame([
+            {
+                'Username': user['username'],
+                'Role': 'Admin' if user['role'] == 'admin' else 'User',
+                'Status': 'Locked' if user.get('failed_login_attempts', 0) >= locked_threshold else 'Active',
+                'Created': user['created_at'][:10] if user['created_at'] else 'Unknown',
+                'Last Login': user['last_login'][:10] if user.get('last_login') else 'Never'
+            }
+            for user in users
+        ])
+        
+        selection = st.dataframe(
+            users_df,
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key="users_table"
+        )
         
-        .role-badge {
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 0.8rem;
-            font-weight: 600;
-            margin: 4px 0;
-        }
+        if not selection.selection.rows:
+            st.caption("Select a user in the table to manage their account.")
+            return
         
-        .admin-badge {
-            background: rgba(255, 193, 7, 0.2);
-            color: #ffc107;
-            border: 1px solid rgba(255, 193, 7, 0.3);
-        }
+        user = users[selection.selection.rows[0]]
+        is_locked = user.get('failed_login_attempts', 0) >= locked_threshold
         
-        .user-badge {
-            background: rgba(40, 167, 69, 0.2);
-            color: #28a745;
-            border: 1px solid rgba(40, 167, 69, 0.3);
-        }
-        
-        .status-active {
-            color: #28a745;
-            font-weight: 600;
-        }
+        # Action buttons for the selected user
+        st.markdown(f"**Selected:** {user['username']}")
+        col1, col2, col3 = st.columns(3)
         
-        .status-locked {
-            color: #dc3545;
-            font-weight: 600;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        with col1:
+            # Change role button
+            st.button("Change Role", key=f"role_{user['id']}", 
+                      help="Change user role", type="secondary", use_container_width=True,
+                      on_click=self._open_user_action, args=(user['id'], 'role'))
         
-        st.subheader("Current Users")
+        with col2:
+            # Unlock account button
+            if st.button("Unlock", key=f"unlock_{user['id']}", 
+                       help="Unlock account" if is_locked else "Account is not locked",
+                       disabled=not is_locked, type="secondary", use_container_width=True):
+                success = self.db_manager.reset_failed_login_attempts(
+                    user['id'], 
+                    current_admin_name,
+                    client_ip
+                )
+                if success:
+                    self._invalidate_users()
+                    st.success(f"Account unlocked for {user['username']}")
+                    st.rerun()
+                else:
+                    st.error("Failed to unlock account")
         
-        users = self.db_manager.get_users()
+        with col3:
+            # Delete user button (with protection)
+            can_delete = user['username'] != current_admin_name  # Can't delete self
+            
+            st.button("Delete", key=f"delete_{user['id']}", 
+                      help="Delete user" if can_delete else "Cannot delete yourself",
+                      disabled=not can_delete, type="secondary", use_container_width=True,
+                      on_click=self._open_user_action, args=(user['id'], 'delete'))
         
-        if not users:
-            st.info("No users found.")
-            return
+        user_action = st.session_state.user_action
         
-        # Users in beautiful card layout
-        for user in users:
-            # Determine card style based on user status and role
-            is_locked = user.get('failed_login_attempts', 0) >= 5
-            is_admin = user['role'] == 'admin'
-            
-            card_class = "locked-card" if is_locked else ("admin-card" if is_admin else "user-normal-card")
-            
-            with st.container():
-                # User card with gradient background
-                st.markdown(f'<div class="user-card {card_class}">', unsafe_allow_html=True)
-                
-                # Main user info
-                col1, col2, col3 = st.columns([3, 2, 2])
-                
-                with col1:
-                    # User header
-                    st.markdown(f'<div class="user-header">{user["username"]}</div>', unsafe_allow_html=True)
-                    
-                    # Role badge
-                    if is_admin:
-                        st.markdown('<span class="role-badge admin-badge">Admin</span>', unsafe_allow_html=True)
-                    else:
-                        st.markdown('<span class="role-badge user-badge">User</span>', unsafe_allow_html=True)
-                    
-                    # Created date
-                    created_date = user['created_at'][:10] if user['created_at'] else 'Unknown'
-                    st.markdown(f'<div class="user-info">Created: {created_date}</div>', unsafe_allow_html=True)
-                
-                with col2:
-                    # Account status with better styling
-                    if is_locked:
-                        st.markdown('<div class="status-locked">Locked</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown('<div class="status-active">Active</div>', unsafe_allow_html=True)
-                    
-                    # Last login
-                    if user.get('last_login'):
-                        last_login = user['last_login'][:10]
-                        st.markdown(f'<div class="user-info">Last: {last_login}</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown('<div class="user-info">Never</div>', unsafe_allow_html=True)
-                
-                with col3:
-                    # Action buttons with better styling
-                    st.markdown('<div style="margin-top: 8px;">', unsafe_allow_html=True)
-                    
-                    # Change role button
-                    if st.button("Change Role", key=f"role_{user['id']}", 
-                               help="Change user role", type="secondary"):
-                        st.session_state[f'change_role_{user["id"]}'] = True
-                        st.rerun()
-                    
-                    # Unlock account button
-                    if is_locked:
-                        if st.button("Unlock", key=f"unlock_{user['id']}", 
-                                   help="Unlock account", type="secondary"):
-                            success = self.db_manager.reset_failed_login_attempts(
-                                user['id'], 
-                                self.auth_manager.get_current_user()['username'],
-                                self._get_client_ip()
-                            )
-                            if success:
-                                st.success(f"Account unlocked for {user['username']}")
-                                st.rerun()
-                            else:
-                                st.error("Failed to unlock account")
-                    
-                    # Delete user button (with protection)
-                    current_admin = self.auth_manager.get_current_user()
-                    can_delete = user['username'] != current_admin['username']  # Can't delete self
-                    
-                    if st.button("Delete", key=f"delete_{user['id']}", 
-                               help="Delete user" if can_delete else "Cannot delete yourself",
-                               disabled=not can_delete, type="secondary"):
-                        st.session_state[f'confirm_delete_{user["id"]}'] = True
-                        st.rerun()
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
+        # Role change dialog
+        if user_action == (user['id'], 'role'):
+            with st.form(f"change_role_form_{user['id']}"):
+                st.write(f"Change role for **{user['username']}**")
+                current_role = user['role']
+                new_role = st.selectbox(
+                    "New Role",
+                    options=['user', 'admin'],
+                    index=0 if current_role == 'admin' else 1,
+                    key=f"new_role_{user['id']}"
+                )
                 
-                # Role change dialog
-                if st.session_state.get(f'change_role_{user["id"]}', False):
-                    with st.form(f"change_role_form_{user['id']}"):
-                        st.write(f"Change role for **{user['username']}**")
-                        current_role = user['role']
-                        new_role = st.selectbox(
-                            "New Role",
-                            options=['user', 'admin'],
-                            index=0 if current_role == 'admin' else 1,
-                            key=f"new_role_{user['id']}"
+                col_submit, col_cancel = st.columns(2)
+                with col_submit:
+                    if st.form_submit_button("Confirm"):
+                        success = self.db_manager.change_user_role(
+                            user['id'], new_role,
+                            current_admin_name,
+                            client_ip
                         )
-                        
-                        col_submit, col_cancel = st.columns(2)
-                        with col_submit:
-                            if st.form_submit_button("Confirm"):
-                                success = self.db_manager.change_user_role(
-                                    user['id'], new_role,
-                                    self.auth_manager.get_current_user()['username'],
-                                    self._get_client_ip()
-                                )
-                                if success:
-                                    st.success(f"Role changed to {new_role} for {user['username']}")
-                                else:
-                                    st.error("Failed to change role")
-                                st.session_state[f'change_role_{user["id"]}'] = False
-                                st.rerun()
-                        
-                        with col_cancel:
-                            if st.form_submit_button("Cancel"):
-                                st.session_state[f'change_role_{user["id"]}'] = False
-                                st.rerun()
-                
-                # Delete confirmation dialog
-                if st.session_state.get(f'confirm_delete_{user["id"]}', False):
-                    st.error(f"**Delete user '{user['username']}'?**")
-                    st.write("This action cannot be undone.")
-                    
-                    col_confirm, col_cancel = st.columns(2)
-                    with col_confirm:
-                        if st.button("Delete", key=f"confirm_delete_{user['id']}"):
-                            success = self.db_manager.delete_user(
-                                user['id'],
-                                self.auth_manager.get_current_user()['username'],
-                                self._get_client_ip()
-                            )
-                            if success:
-                                st.success(f"User {user['username']} deleted successfully")
-                            else:
-                                st.error("Failed to delete user")
-                            st.session_state[f'confirm_delete_{user["id"]}'] = False
-                            st.rerun()
-                    
-                    with col_cancel:
-                        if st.button("Cancel", key=f"cancel_delete_{user['id']}"):
-                            st.session_state[f'confirm_delete_{user["id"]}'] = False
-                            st.rerun()
+                        if success:
+                            self._invalidate_users()
+                            st.success(f"Role changed to {new_role} for {user['username']}")
+                        else:
+                            st.error("Failed to change role")
+                        st.session_state.user_action = None
+                        st.rerun()
                 
-                st.markdown("---")
+                with col_cancel:
+                    st.form_submit_button("Cancel", on_click=self._close_user_action)
+        
+        # Delete confirmation dialog
+        if user_action == (user['id'], 'delete'):
+            st.error(f"**Delete user '{user['username']}'?**")
+            st.write("This action cannot be undone.")
+            
+            col_confirm, col_cancel = st.columns(2)
+            with col_confirm:
+                if st.button("Delete", key=f"confirm_delete_btn_{user['id']}"):
+                    success = self.db_manager.delete_user(
+                        user['id'],
+                        current_admin_name,
+                        client_ip
+                    )
+                    if success:
+                        self._invalidate_users()
+                        st.success(f"User {user['username']} deleted successfully")
+                    else:
+                        st.error("Failed to delete user")
+                    st.session_state.user_action = None
+                    st.rerun()
+            
+            with col_cancel:
+                st.button("Cancel", key=f"cancel_delete_{user['id']}", on_click=self._close_user_action)
     
     def _render_add_user_form(self):
         """Render the add user form with beautiful styling"""
-        # Add custom CSS for the form
-        st.markdown("""
-        <style>
-        .form-container {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 16px;
-            padding: 32px;
-            margin: 16px 0;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        .form-header {
-            color: white;
-            font-size: 1.5rem;
-            font-weight: 600;
-            margin-bottom: 20px;
-            text-align: center;
-        }
-        
-        .form-section {
-            margin-bottom: 16px;
-        }
-        
-        .input-label {
-            color: white;
-            font-weight: 500;
-            margin-bottom: 8px;
-            display: block;
-        }
-        
-        .security-info {
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 12px;
-            padding: 16px;
-            margin-top: 20px;
-            border: 1px solid rgba(255, 255, 255, 0.2);
-        }
-        
-        .security-title {
-            color: white;
-            font-weight: 600;
-            margin-bottom: 12px;
-        }
-        
-        .security-item {
-            color: rgba(255, 255, 255, 0.9);
-            font-size: 0.9rem;
-            margin-bottom: 4px;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
         st.subheader("Add New User")
         
+        current_admin = self.auth_manager.get_current_user()
+        
         # Beautiful form container
         st.markdown('<div class="form-container">', unsafe_allow_html=True)
         st.markdown('<div class="form-header">Create New User Account</div>', unsafe_allow_html=True)
@@ -2644,11 +2723,12 @@ Please try again, and if the problem persists, check that all services are runni
                         username=new_username,
                         password=new_password,
                         role=new_role,
-                        creator_username=self.auth_manager.get_current_user()['username'],
+                        creator_username=current_admin['username'],
                         ip_address=self._get_client_ip()
                     )
                     
                     if success:
+                        self._invalidate_users()
                         st.success(f"User '{new_username}' created successfully with role '{new_role}'")
                         # Clear form by rerunning
                         st.rerun()
@@ -2671,97 +2751,21 @@ Please try again, and if the problem persists, check that all services are runni
     
     def _render_user_statistics(self):
         """Render user statistics and insights with beautiful cards"""
-        # Add custom CSS for statistics cards
-        st.markdown("""
-        <style>
-        .stats-container {
-            display: flex;
-            gap: 16px;
-            margin: 20px 0;
-            flex-wrap: wrap;
-        }
-        
-        .stat-card {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 16px;
-            padding: 24px;
-            flex: 1;
-            min-width: 200px;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            text-align: center;
-            transition: all 0.3s ease;
-        }
-        
-        .stat-card:hover {
-            transform: translateY(-4px);
-            box-shadow: 0 12px 40px rgba(0, 0, 0, 0.15);
-        }
-        
-        .stat-number {
-            font-size: 2.2rem;
-            font-weight: bold;
-            color: white;
-            margin-bottom: 8px;
-        }
-        
-        .stat-label {
-            color: rgba(255, 255, 255, 0.9);
-            font-size: 1rem;
-            font-weight: 500;
-        }
-        
-        .activity-card {
-            background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-            border-radius: 16px;
-            padding: 24px;
-            margin: 20px 0;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        .activity-header {
-            color: white;
-            font-size: 1.3rem;
-            font-weight: 600;
-            margin-bottom: 16px;
-            text-align: center;
-        }
-        
-        .activity-item {
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 8px;
-            padding: 12px;
-            margin: 8px 0;
-            color: white;
-            border-left: 4px solid rgba(255, 255, 255, 0.3);
-        }
-        
-        .success-item {
-            border-left-color: #28a745;
-        }
-        
-        .failed-item {
-            border-left-color: #dc3545;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
         st.subheader("User Statistics")
         
-        users = self.db_manager.get_users()
+        user_counts = _get_user_counts_cached(
+            self.db_manager, st.session_state.users_version, self.auth_manager.max_failed_attempts
+        )
         
-        if not users:
+        if not user_counts['total']:
             st.info("No user data available.")
             return
         
         # Basic stats calculation
-        total_users = len(users)
-        admin_users = sum(1 for user in users if user['role'] == 'admin')
+        total_users = user_counts['total']
+        admin_users = user_counts['admins']
         regular_users = total_users - admin_users
-        locked_accounts = sum(1 for user in users if user.get('failed_login_attempts', 0) >= 5)
+        locked_accounts = user_counts['locked']
         
         # Beautiful statistics cards
         st.markdown("""
@@ -2785,37 +2789,26 @@ Please try again, and if the problem persists, check that all services are runni
         </div>
         """.format(total_users, admin_users, regular_users, locked_accounts), unsafe_allow_html=True)
         
-        # Recent activity with beautiful styling
-        st.markdown("""
-        <div class="activity-card">
-            <div class="activity-header">Recent User Activity</div>
-        """, unsafe_allow_html=True)
-        
-        recent_logs, _ = self.db_manager.get_audit_logs_filtered(
-            page=1, 
-            page_size=10,
-            action_type="LOGIN"
-        )
+        # Recent activity with beautiful styling, sent as one element
+        # The statistics cards above are already on the page while this loads
+        with st.spinner("Loading activity..."):
+            recent_logs = _get_recent_logins_cached(self.db_manager, 5)  # Show last 5 login events
         
         if recent_logs:
-            for log in recent_logs[:5]:  # Show last 5 login events
-                timestamp = log['timestamp'][:19] if log['timestamp'] else 'Unknown'
-                status_class = "success-item" if log['status'] == 'success' else "failed-item"
-                status_text = "[SUCCESS]" if log['status'] == 'success' else "[FAILED]"
-                
-                st.markdown(f"""
-                <div class="activity-item {status_class}">
-                    {status_text} <strong>{log['username']}</strong> - {timestamp}
-                </div>
-                """, unsafe_allow_html=True)
+            activity_items = "".join([
+                f'<div class="activity-item {ACTIVITY_STATUS_CLASSES.get(log["status"], "failed-item")}">'
+                f'{log["status_label"]} <strong>{log["username"]}</strong> - {log["ts"]}</div>'
+                for log in recent_logs
+            ])
         else:
-            st.markdown("""
-            <div class="activity-item">
-                No recent login activity
-            </div>
-            """, unsafe_allow_html=True)
+            activity_items = '<div class="activity-item">No recent login activity</div>'
         
-        st.markdown('</div>', unsafe_allow_html=True)  # Close activity card
+        st.markdown(
+            '<div class="activity-card">'
+            '<div class="activity-header">Recent User Activity</div>'
+            f'{activity_items}</div>',
+            unsafe_allow_html=True
+        )
     
     def run(self):
         """Main application loop"""
@@ -2827,32 +2820,26 @@ Please try again, and if the problem persists, check that all services are runni
             self.auth_manager.show_login_page()
             return
         
+        # App state is only needed once a user is signed in
+        self._initialize_session_state()
+        
         # Main authenticated app
         self.render_header()
         
-        # Check API health on startup
-        if st.session_state.api_status == "unknown":
-            self.check_api_health()
-        if st.session_state.ai_service_status == "unknown":
-            self.check_ai_service_health()
-        
-        # Sidebar content
+        # Service status (also performs the health checks)
         self.render_api_status()
         self.auth_manager.show_user_menu()
         self.render_navigation()
         self.render_settings_sidebar()
         
-        # Main content area based on current view
-        if st.session_state.current_view == 'chat':
-            self.render_chat_interface()
-        elif st.session_state.current_view == 'documents':
-            self.render_document_management()
-        elif st.session_state.current_view == 'analytics':
-            self.render_analytics_dashboard()
-        elif st.session_state.current_view == 'audit':
-            self.render_audit_logs()
-        elif st.session_state.current_view == 'users':
-            self.render_user_management()
+        # Main content area based on current view; views log their access only
+        # on the run that enters them
+        current_view = st.session_state.current_view
+        self._entered_view = st.session_state.get('rendered_view') != current_view
+        st.session_state.rendered_view = current_view
+        render_view = self._views.get(current_view)
+        if render_view:
+            render_view()
         
         # Chat input is now handled within render_chat_interface() to ensure proper rendering order
 
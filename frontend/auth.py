@@ -24,8 +24,8 @@ class AuthManager:
     Features: Session management, failed login tracking, comprehensive audit logs
     """
     
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        self.db_manager = db_manager or DatabaseManager()
         self.max_failed_attempts = 5  # Lock account after 5 failed attempts
         self._initialize_session_security()
     
@@ -37,8 +37,20 @@ class AuthManager:
             st.session_state.session_start_time = datetime.now()
             st.session_state.last_activity = datetime.now()
     
-    def _get_client_ip(self) -> str:
-        """Get client IP address for audit logging"""
+    def get_client_ip(self) -> str:
+        """Get client IP address for audit logging; headers are fixed for a session, so read once"""
+        if 'client_ip' not in st.session_state:
+            st.session_state.client_ip = self._read_client_ip()
+        return st.session_state.client_ip
+    
+    def get_user_agent(self) -> str:
+        """Get user agent for audit logging; read once per session like the client IP"""
+        if 'client_user_agent' not in st.session_state:
+            st.session_state.client_user_agent = self._read_user_agent()
+        return st.session_state.client_user_agent
+    
+    def _read_client_ip(self) -> str:
+        """Read the client IP address from the request headers"""
         try:
             if hasattr(st, 'context') and hasattr(st.context, 'headers'):
                 forwarded_for = st.context.headers.get('X-Forwarded-For')
@@ -53,8 +65,8 @@ class AuthManager:
         except Exception:
             return "unknown"
     
-    def _get_user_agent(self) -> str:
-        """Get user agent for audit logging"""
+    def _read_user_agent(self) -> str:
+        """Read the user agent from the request headers"""
         try:
             if hasattr(st, 'context') and hasattr(st.context, 'headers'):
                 return st.context.headers.get('User-Agent', 'unknown')
@@ -89,8 +101,8 @@ class AuthManager:
         Returns:
             True if authentication successful, False otherwise
         """
-        ip_address = self._get_client_ip()
-        user_agent = self._get_user_agent()
+        ip_address = self.get_client_ip()
+        user_agent = self.get_user_agent()
         session_id = st.session_state.get('session_id', 'unknown')
         
         # Check if account is locked
@@ -152,7 +164,7 @@ class AuthManager:
         Logout user with comprehensive audit logging
         """
         current_user = self.get_current_user()
-        ip_address = self._get_client_ip()
+        ip_address = self.get_client_ip()
         session_id = st.session_state.get('session_id', 'unknown')
         
         if current_user:
@@ -247,7 +259,7 @@ class AuthManager:
                 resource="admin_area",
                 status="failure",
                 details="Non-admin user attempted to access admin functionality",
-                ip_address=self._get_client_ip(),
+                ip_address=self.get_client_ip(),
                 session_id=st.session_state.get('session_id', 'unknown'),
                 severity_level="WARNING"
             )
@@ -274,7 +286,7 @@ class AuthManager:
                 resource="admin_features",
                 status="failure",
                 details=f"Non-admin user attempted to {action_description}",
-                ip_address=self._get_client_ip(),
+                ip_address=self.get_client_ip(),
                 session_id=st.session_state.get('session_id', 'unknown'),
                 severity_level="WARNING"
             )
@@ -303,8 +315,8 @@ class AuthManager:
             resource="user_action",
             status="success",
             details=details,
-            ip_address=self._get_client_ip(),
-            user_agent=self._get_user_agent(),
+            ip_address=self.get_client_ip(),
+            user_agent=self.get_user_agent(),
             session_id=st.session_state.get('session_id', 'unknown'),
             severity_level="INFO"
         )
@@ -344,7 +356,7 @@ class AuthManager:
                     return
                 
                 # Log login attempt
-                ip_address = self._get_client_ip()
+                ip_address = self.get_client_ip()
                 self.db_manager.log_audit_event(
                     user_id=None,
                     username=username,
@@ -353,7 +365,7 @@ class AuthManager:
                     status="initiated",
                     details=f"User attempted login from IP: {ip_address}",
                     ip_address=ip_address,
-                    user_agent=self._get_user_agent(),
+                    user_agent=self.get_user_agent(),
                     session_id=st.session_state.get('session_id', 'unknown'),
                     severity_level="INFO"
                 )
@@ -522,7 +534,7 @@ class AuthManager:
                     return
                 
                 # Attempt password change
-                ip_address = self._get_client_ip()
+                ip_address = self.get_client_ip()
                 session_id = st.session_state.get('session_id', 'unknown')
                 
                 success = self.db_manager.change_password(
@@ -586,6 +598,6 @@ class AuthManager:
             'role': current_user['role'] if current_user else 'none',
             'login_time': login_time.isoformat(),
             'last_activity': st.session_state.get('last_activity', datetime.now()).isoformat(),
-            'ip_address': self._get_client_ip(),
-            'user_agent': self._get_user_agent()
+            'ip_address': self.get_client_ip(),
+            'user_agent': self.get_user_agent()
         } 
\ No newline at end of file
@@ -8,15 +8,243 @@ import hashlib
 import bcrypt
 import json
 import ipaddress
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, timedelta, date
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 from pathlib import Path
 import logging
+import queue
+import threading
+import atexit
+from functools import lru_cache
 from cryptography.fernet import Fernet
 import os
 
 logger = logging.getLogger(__name__)
 
+# Audit log retention and export configuration
+AUDIT_TRAIL_RETENTION_DAYS = 90
+AUDIT_TRAIL_CLEANUP_BATCH_SIZE = 10000
+AUDIT_EXPORT_BATCH_SIZE = 10000
+AUDIT_FILTER_KEYS = ('action_type', 'username', 'status', 'severity_level', 'date_from', 'date_to')
+
+# Audit event filter: comma-separated action types that are never recorded
+AUDIT_IGNORED_ACTIONS = frozenset(
+    action.strip() for action in os.getenv("AUDIT_IGNORED_ACTIONS", "").split(",") if action.strip()
+)
+if AUDIT_IGNORED_ACTIONS:
+    logger.warning(f"Audit events not recorded (AUDIT_IGNORED_ACTIONS): {', '.join(sorted(AUDIT_IGNORED_ACTIONS))}")
+
+# Audit write buffer: bounded so a slow database throttles producers instead of
+# letting pending events pile up in memory
+AUDIT_BUFFER_MAX = 10_000
+AUDIT_BUFFER_BATCH_SIZE = 500
+AUDIT_BUFFER_PUT_TIMEOUT = 1.0
+# Longest a reader waits for its own queued events before querying without them
+AUDIT_BUFFER_FLUSH_TIMEOUT = 2.0
+
+# Queued rows hold every column but the two digests, which the writer appends
+AUDIT_INSERT_SQL = """
+    INSERT INTO audit_logs (
+        user_id, username, action_type, resource, status,
+        ip_address, user_agent, session_id, request_id, 
+        severity_level, details_hash, content_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Per-connection settings: in WAL mode a commit only needs a durable fsync at
+# checkpoints, and NORMAL is the recommended (still crash-safe) level for it
+SQLITE_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+)
+
+def _configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply SQLITE_CONNECTION_PRAGMAS to a new connection"""
+    for pragma in SQLITE_CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# Audit details are interned in audit_details keyed by their SHA-256 digest;
+# digests of this many recent details strings are kept rather than rehashed
+AUDIT_DETAILS_CACHE_SIZE = 1024
+
+# Audit log columns with the details text resolved from audit_details
+AUDIT_DETAILS_JOIN = "audit_logs LEFT JOIN audit_details ON audit_details.hash = audit_logs.details_hash"
+AUDIT_DETAILS_COLUMN = "COALESCE(audit_details.text, audit_logs.details) AS details"
+
+@lru_cache(maxsize=AUDIT_DETAILS_CACHE_SIZE)
+def _details_digest(details: str) -> bytes:
+    """SHA-256 digest identifying an interned audit details string"""
+    return hashlib.sha256(details.encode('utf-8')).digest()
+
+def _content_hash(content: str) -> str:
+    """Truncated SHA-256 hex digest of sensitive content (prompts, etc.) for the audit trail"""
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+class _SequencedQueue(queue.Queue):
+    """FIFO queue that numbers items as they are enqueued and remembers each thread's last number"""
+    
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.put_count = 0
+        self.last_put = threading.local()
+    
+    def _put(self, item):
+        # Runs under the queue's mutex, so numbers follow queue order
+        super()._put(item)
+        self.put_count += 1
+        self.last_put.seq = self.put_count
+
+class AuditBuffer:
+    """
+    Write-behind buffer for audit rows, shared by every DatabaseManager on a database
+    
+    Producers enqueue rows and return immediately; one daemon thread drains the
+    queue and writes it in batches with executemany. Each row carries its
+    details text and any content to hash; the writer computes both digests, so
+    hashing long prompts stays off the request path. Details are interned in
+    audit_details in the same transaction as their rows. When the queue is full a
+    producer waits up to AUDIT_BUFFER_PUT_TIMEOUT, then writes its row
+    synchronously and counts the event in ``buffer_pressure``.
+    """
+    
+    _instances: Dict[str, "AuditBuffer"] = {}
+    _instances_lock = threading.Lock()
+    
+    @classmethod
+    def for_database(cls, db_path: str) -> "AuditBuffer":
+        """Get the process-wide buffer for a database file"""
+        with cls._instances_lock:
+            buffer = cls._instances.get(db_path)
+            if buffer is None:
+                buffer = cls._instances[db_path] = cls(db_path)
+            return buffer
+    
+    def __init__(self, db_path: str, max_size: int = AUDIT_BUFFER_MAX,
+                 batch_size: int = AUDIT_BUFFER_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.queue: "queue.Queue[tuple]" = _SequencedQueue(maxsize=max_size)
+        self._written = 0
+        self._written_cond = threading.Condition()
+        self.buffer_pressure = 0
+        self._pressure_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._drain, name="audit-buffer", daemon=True)
+        self._worker.start()
+        atexit.register(self.queue.join)
+    
+    def put(self, row: tuple, details: str = "", content: str = ""):
+        """Queue an audit row with its details text and content to hash, writing directly if the buffer stays full"""
+        try:
+            self.queue.put((row, details, content), timeout=AUDIT_BUFFER_PUT_TIMEOUT)
+        except queue.Full:
+            with self._pressure_lock:
+                self.buffer_pressure += 1
+            logger.warning("Audit buffer full; writing event synchronously")
+            self._write([(row, details, content)])
+    
+    def flush(self, timeout: float = AUDIT_BUFFER_FLUSH_TIMEOUT) -> bool:
+        """
+        Wait until the rows queued by the calling thread have been written
+        
+        Rows queued later by other threads are not waited for, so a busy
+        buffer cannot hold a reader indefinitely. Returns False if the rows
+        were still pending after ``timeout`` seconds.
+        """
+        seq = getattr(self.queue.last_put, 'seq', 0)
+        with self._written_cond:
+            return self._written_cond.wait_for(lambda: self._written >= seq, timeout)
+    
+    def _drain(self):
+        """Consumer loop: write queued rows in batches of up to batch_size"""
+        while True:
+            rows = [self.queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(rows)
+            except Exception as error:
+                logger.error(f"Error writing buffered audit events: {error}")
+            finally:
+                with self._written_cond:
+                    self._written += len(rows)
+                    self._written_cond.notify_all()
+                for _ in rows:
+                    self.queue.task_done()
+    
+    def _write(self, entries: List[Tuple[tuple, str, str]]):
+        rows = []
+        digests = {}
+        for row, details, content in entries:
+            digest = _details_digest(details) if details else None
+            if digest is not None:
+                digests[digest] = details
+            rows.append(row + (digest, _content_hash(content) if content else ""))
+        
+        conn = _configure_connection(sqlite3.connect(self.db_path, timeout=30))
+        try:
+            # Details are interned in the same transaction as the rows that
+            # reference them, so a concurrent cleanup (from this or another
+            # process) can never leave a row pointing at a deleted text
+            with conn:
+                if digests:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO audit_details (hash, text) VALUES (?, ?)",
+                        digests.items()
+                    )
+                conn.executemany(AUDIT_INSERT_SQL, rows)
+        finally:
+            conn.close()
+
+class AuditContext:
+    """
+    Records an audited operation as a single audit event written on exit
+    
+    The block sets ``status`` and ``details`` as the operation progresses; the
+    final action type is the base action plus a status suffix (for example
+    DOC_DELETE -> DOC_DELETE_SUCCESS). An exception escaping the block is
+    recorded as an error and re-raised.
+    """
+    
+    STATUS_SUFFIXES = {'success': 'SUCCESS', 'failure': 'FAILED', 'error': 'ERROR'}
+    STATUS_SEVERITIES = {'success': 'INFO', 'failure': 'WARNING', 'error': 'ERROR'}
+    
+    def __init__(self, db_manager: "DatabaseManager", action: str, user_id: Optional[int],
+                 username: str, resource: str = "", **event_fields):
+        self.db_manager = db_manager
+        self.action = action
+        self.user_id = user_id
+        self.username = username
+        self.resource = resource
+        self.event_fields = event_fields
+        self.status = "success"
+        self.details = ""
+    
+    def __enter__(self) -> "AuditContext":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        # Script-control exceptions (e.g. st.rerun) derive from BaseException and
+        # are not failures of the audited operation
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.status = "error"
+            self.details = f"{self.action} error: {exc_value}"
+        
+        self.db_manager.log_audit_event(
+            user_id=self.user_id,
+            username=self.username,
+            action_type=f"{self.action}_{self.STATUS_SUFFIXES.get(self.status, self.status.upper())}",
+            resource=self.resource,
+            status=self.status,
+            details=self.details,
+            severity_level=self.STATUS_SEVERITIES.get(self.status, "INFO"),
+            **self.event_fields
+        )
+        return False
+
 class DatabaseManager:
     """Manages SQLite database operations for users and comprehensive audit logs"""
     
@@ -25,6 +253,7 @@ class DatabaseManager:
         self._encryption_key = self._get_or_create_encryption_key()
         self._cipher = Fernet(self._encryption_key)
         self._ensure_database_directory()
+        self._audit_buffer = AuditBuffer.for_database(db_path)
         self._initialize_database()
     
     def _get_or_create_encryption_key(self) -> bytes:
@@ -71,17 +300,13 @@ class DatabaseManager:
         except Exception:
             return "unknown"
     
-    def _hash_content(self, content: str) -> str:
-        """Create SHA-256 hash of sensitive content"""
-        return hashlib.sha256(content.encode()).hexdigest()[:16]  # First 16 chars for audit trail
-    
     def _ensure_database_directory(self):
         """Ensure the database directory exists"""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
     
     def _get_connection(self):
         """Get database connection with proper configuration"""
-        conn = sqlite3.connect(self.db_path)
+        conn = _configure_connection(sqlite3.connect(self.db_path))
         conn.row_factory = sqlite3.Row
         # Enable foreign keys
         conn.execute("PRAGMA foreign_keys = ON")
@@ -106,6 +331,19 @@ class DatabaseManager:
                     cursor.execute("ALTER TABLE users ADD COLUMN failed_login_attempts INTEGER DEFAULT 0")
                     logger.info("Added failed_login_attempts column to users table")
                 
+                # Covers the user count aggregate so it never reads the table rows
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_users_active_role_attempts
+                    ON users(is_active, role, failed_login_attempts)
+                """)
+                
+                cursor.execute("PRAGMA table_info(audit_logs)")
+                audit_columns = [column[1] for column in cursor.fetchall()]
+                
+                if 'details_hash' not in audit_columns:
+                    cursor.execute("ALTER TABLE audit_logs ADD COLUMN details_hash BLOB")
+                    logger.info("Added details_hash column to audit_logs table")
+                
                 conn.commit()
                 
         except Exception as e:
@@ -117,6 +355,11 @@ class DatabaseManager:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
+                # Write-ahead logging is stored in the database file, so setting it
+                # once lets readers (the audit viewer) and the audit writer run
+                # concurrently instead of blocking each other
+                cursor.execute("PRAGMA journal_mode = WAL")
+                
                 # Create users table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS users (
@@ -143,6 +386,7 @@ class DatabaseManager:
                         resource TEXT,
                         status TEXT DEFAULT 'success',
                         details TEXT,
+                        details_hash BLOB,
                         severity_level TEXT DEFAULT 'INFO',
                         content_hash TEXT,
                         session_id TEXT,
@@ -152,6 +396,14 @@ class DatabaseManager:
                     )
                 """)
                 
+                # Interned audit details, referenced by audit_logs.details_hash
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS audit_details (
+                        hash BLOB PRIMARY KEY,
+                        text TEXT NOT NULL
+                    ) WITHOUT ROWID
+                """)
+                
                 # Chat sessions table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS chat_sessions (
@@ -182,9 +434,21 @@ class DatabaseManager:
                 # Create indexes for performance
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_logs(timestamp)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_user_id ON audit_logs(user_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_action_type ON audit_logs(action_type)")
+                # Action prefix filter + newest-first order (recent activity lists);
+                # supersedes the single-column action_type index
+                cursor.execute("DROP INDEX IF EXISTS idx_audit_action_type")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_action_ts ON audit_logs(action_type, timestamp DESC)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_status ON audit_logs(status)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_username ON audit_logs(username)")
+                # Composite index for the filtered audit view: the timestamp range and
+                # ORDER BY are served by the leading column and the remaining filter
+                # columns are checked from the index without visiting the table.
+                # It supersedes the narrower (timestamp, action_type) index.
+                cursor.execute("DROP INDEX IF EXISTS idx_audit_timestamp_action")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_audit_ts_filters
+                    ON audit_logs(timestamp DESC, action_type, status, severity_level, username)
+                """)
                 
                 # Chat indexes for performance
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_user_id ON chat_sessions(user_id)")
@@ -245,15 +509,33 @@ class DatabaseManager:
             logger.warning(f"Could not migrate old audit table: {e}")
     
     def _cleanup_old_logs(self):
-        """Clean up audit logs older than 90 days"""
+        """Clean up audit logs older than the retention period, in batches"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=90)
+            cutoff_date = datetime.now() - timedelta(days=AUDIT_TRAIL_RETENTION_DAYS)
+            cutoff = cutoff_date.strftime('%Y-%m-%d %H:%M:%S')
+            deleted_count = 0
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("DELETE FROM audit_logs WHERE timestamp < ?", (cutoff_date,))
-                deleted_count = cursor.rowcount
-                conn.commit()
+                # Delete in bounded batches so a large backlog never holds the
+                # write lock for one long transaction
+                while True:
+                    cursor.execute("""
+                        DELETE FROM audit_logs WHERE id IN (
+                            SELECT id FROM audit_logs WHERE timestamp < ? LIMIT ?
+                        )
+                    """, (cutoff, AUDIT_TRAIL_CLEANUP_BATCH_SIZE))
+                    conn.commit()
+                    deleted_count += cursor.rowcount
+                    if cursor.rowcount < AUDIT_TRAIL_CLEANUP_BATCH_SIZE:
+                        break
                 if deleted_count > 0:
+                    # Drop interned details no longer referenced by any log entry
+                    cursor.execute("""
+                        DELETE FROM audit_details WHERE hash NOT IN (
+                            SELECT details_hash FROM audit_logs WHERE details_hash IS NOT NULL
+                        )
+                    """)
+                    conn.commit()
                     logger.info(f"Cleaned up {deleted_count} old audit log entries")
         except Exception as e:
             logger.error(f"Error cleaning up old logs: {e}")
@@ -415,31 +697,29 @@ class DatabaseManager:
             severity_level: INFO/WARNING/ERROR
             content_to_hash: Sensitive content to hash (prompts, etc.)
         """
+        if action_type in AUDIT_IGNORED_ACTIONS:
+            return
+        
         try:
             # Process IP address (encrypt or anonymize based on configuration)
             processed_ip = self._anonymize_ip(ip_address) if ip_address else ""
             
-            # Hash sensitive content if provided
-            content_hash = self._hash_content(content_to_hash) if content_to_hash else ""
-            
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO audit_logs (
-                        user_id, username, action_type, resource, status, details,
-                        ip_address, user_agent, session_id, request_id, 
-                        severity_level, content_hash
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    user_id, username, action_type, resource, status, details,
-                    processed_ip, user_agent, session_id, request_id, 
-                    severity_level, content_hash
-                ))
-                conn.commit()
+            # The buffer's writer hashes the details text and any sensitive
+            # content; only their digests are stored on the audit row
+            self._audit_buffer.put((
+                user_id, username, action_type, resource, status,
+                processed_ip, user_agent, session_id, request_id, 
+                severity_level
+            ), details, content_to_hash)
                 
         except Exception as error:
             logger.error(f"Error logging audit event: {error}")
     
+    def audit_context(self, action: str, user_id: Optional[int], username: str,
+                      resource: str = "", **event_fields) -> AuditContext:
+        """Start an audited operation that is logged as one event when it completes"""
+        return AuditContext(self, action, user_id, username, resource, **event_fields)
+    
     def log_user_action(self, user_id: Optional[int], username: str, action: str, 
                        details: str = "", ip_address: str = ""):
         """Legacy method for backward compatibility"""
@@ -451,88 +731,114 @@ class DatabaseManager:
             ip_address=ip_address
         )
     
+    def _build_audit_filters(self, action_type: str = "", username: str = "",
+                             status: str = "", severity_level: str = "",
+                             date_from: str = "", date_to: str = "") -> Tuple[str, List[Any]]:
+        """Build the WHERE clause and parameters shared by audit log queries"""
+        where_conditions = []
+        params = []
+        
+        # Action types are filtered by prefix (LOGIN matches LOGIN_SUCCESS, ...) as a
+        # half-open range, which the action_type index can seek into
+        if action_type:
+            action_prefix = action_type.upper()
+            where_conditions.append("action_type >= ? AND action_type < ?")
+            params.extend([action_prefix, action_prefix[:-1] + chr(ord(action_prefix[-1]) + 1)])
+        
+        if username:
+            where_conditions.append("username LIKE ?")
+            params.append(f"%{username}%")
+        
+        if status:
+            where_conditions.append("status = ?")
+            params.append(status)
+        
+        if severity_level:
+            where_conditions.append("severity_level = ?")
+            params.append(severity_level)
+        
+        # Plain range predicates on timestamp (rather than DATE(timestamp)) so the
+        # timestamp indexes can skip rows outside the requested dates
+        if date_from:
+            where_conditions.append("timestamp >= ?")
+            params.append(date_from)
+        
+        if date_to:
+            where_conditions.append("timestamp < ?")
+            params.append((date.fromisoformat(date_to) + timedelta(days=1)).isoformat())
+        
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+        return where_clause, params
+    
     def get_audit_logs_filtered(self, page: int = 1, page_size: int = 50,
                                action_type: str = "", username: str = "",
                                status: str = "", severity_level: str = "",
                                date_from: str = "", date_to: str = "",
-                               user_role: str = "admin") -> Tuple[List[Dict[str, Any]], int]:
+                               user_role: str = "admin",
+                               before: Optional[Tuple[str, int]] = None,
+                               after: Optional[Tuple[str, int]] = None,
+                               include_total: bool = True) -> Tuple[List[Dict[str, Any]], Optional[int]]:
         """
         Get filtered audit logs with pagination
         
+        Args:
+            before: (timestamp, id) of the last row of the previous page; seeks
+                    to the next page without skipping rows via OFFSET
+            after: (timestamp, id) of the first row of the following page;
+                   seeks to the previous page
+            include_total: Count all matching rows; when False the count query
+                           is skipped and total_count is None
+        
         Returns:
             Tuple of (logs_list, total_count)
         """
+        # Make events queued by this request visible to the query
+        self._audit_buffer.flush()
+        
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Build WHERE clause dynamically
-                where_conditions = []
-                params = []
-                
-                if action_type:
-                    where_conditions.append("action_type LIKE ?")
-                    params.append(f"%{action_type}%")
-                
-                if username:
-                    where_conditions.append("username LIKE ?")
-                    params.append(f"%{username}%")
-                
-                if status:
-                    where_conditions.append("status = ?")
-                    params.append(status)
-                
-                if severity_level:
-                    where_conditions.append("severity_level = ?")
-                    params.append(severity_level)
-                
-                if date_from:
-                    where_conditions.append("DATE(timestamp) >= ?")
-                    params.append(date_from)
-                
-                if date_to:
-                    where_conditions.append("DATE(timestamp) <= ?")
-                    params.append(date_to)
-                
-                where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+                where_clause, params = self._build_audit_filters(
+                    action_type, username, status, severity_level, date_from, date_to
+                )
                 
                 # Get total count
-                count_query = f"SELECT COUNT(*) FROM audit_logs WHERE {where_clause}"
-                cursor.execute(count_query, params)
-                total_count = cursor.fetchone()[0]
+                total_count = None
+                if include_total:
+                    count_query = f"SELECT COUNT(*) FROM audit_logs WHERE {where_clause}"
+                    cursor.execute(count_query, params)
+                    total_count = cursor.fetchone()[0]
+                
+                # Get paginated results. Sequential navigation seeks from the
+                # neighbouring page's boundary key; page jumps fall back to OFFSET.
+                if before is not None:
+                    seek_clause, order, limit_params = "AND (timestamp, id) < (?, ?)", "DESC", list(before) + [page_size]
+                    limit_clause = "LIMIT ?"
+                elif after is not None:
+                    seek_clause, order, limit_params = "AND (timestamp, id) > (?, ?)", "ASC", list(after) + [page_size]
+                    limit_clause = "LIMIT ?"
+                else:
+                    seek_clause, order, limit_params = "", "DESC", [page_size, (page - 1) * page_size]
+                    limit_clause = "LIMIT ? OFFSET ?"
                 
-                # Get paginated results
-                offset = (page - 1) * page_size
                 query = f"""
                     SELECT id, timestamp, user_id, username, ip_address, action_type,
-                           resource, status, details, severity_level, content_hash,
+                           resource, status, {AUDIT_DETAILS_COLUMN}, severity_level, content_hash,
                            session_id, user_agent, request_id
-                    FROM audit_logs 
-                    WHERE {where_clause}
-                    ORDER BY timestamp DESC
-                    LIMIT ? OFFSET ?
+                    FROM {AUDIT_DETAILS_JOIN}
+                    WHERE {where_clause} {seek_clause}
+                    ORDER BY timestamp {order}, id {order}
+                    {limit_clause}
                 """
                 
-                cursor.execute(query, params + [page_size, offset])
-                
-                logs = []
-                for row in cursor.fetchall():
-                    logs.append({
-                        'id': row['id'],
-                        'timestamp': row['timestamp'],
-                        'user_id': row['user_id'],
-                        'username': row['username'],
-                        'ip_address': row['ip_address'],
-                        'action_type': row['action_type'],
-                        'resource': row['resource'],
-                        'status': row['status'],
-                        'details': row['details'],
-                        'severity_level': row['severity_level'],
-                        'content_hash': row['content_hash'],
-                        'session_id': row['session_id'],
-                        'user_agent': row['user_agent'],
-                        'request_id': row['request_id']
-                    })
+                cursor.execute(query, params + limit_params)
+                # Build the result while stepping the cursor, so the raw rows are
+                # never held in a second list alongside the dicts
+                logs = [dict(row) for row in cursor]
+                if after is not None:
+                    logs.reverse()
                 
                 return logs, total_count
                 
@@ -540,46 +846,97 @@ class DatabaseManager:
             logger.error(f"Error retrieving filtered audit logs: {error}")
             return [], 0
     
+    def get_recent_logins(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the most recent login events, formatted for display by the query
+        
+        Returns:
+            List of dicts with ts (timestamp to the second), username, status
+            and status_label ([SUCCESS]/[FAILED])
+        """
+        self._audit_buffer.flush()
+        
+        try:
+            where_clause, params = self._build_audit_filters(action_type="LOGIN")
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT COALESCE(substr(timestamp, 1, 19), 'Unknown') AS ts,
+                           username, status,
+                           CASE status WHEN 'success' THEN '[SUCCESS]' ELSE '[FAILED]' END AS status_label
+                    FROM audit_logs
+                    WHERE {where_clause}
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                """, params + [limit])
+                return [dict(row) for row in cursor]
+                
+        except Exception as error:
+            logger.error(f"Error retrieving recent logins: {error}")
+            return []
+    
     def get_audit_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent audit logs (legacy method for backward compatibility)"""
-        logs, _ = self.get_audit_logs_filtered(page=1, page_size=limit)
+        logs, _ = self.get_audit_logs_filtered(page=1, page_size=limit, include_total=False)
         return logs
     
-    def export_audit_logs_csv(self, filters: Dict[str, str] = None) -> str:
-        """Export audit logs to CSV format"""
+    def export_audit_logs_csv(self, filters: Dict[str, str] = None) -> Iterator[bytes]:
+        """
+        Export audit logs to CSV format
+        
+        Rows are streamed from the database in batches of AUDIT_EXPORT_BATCH_SIZE
+        and yielded as UTF-8 encoded CSV chunks, so the full result set is never
+        held in memory at once. A database error is logged and re-raised, so the
+        caller never mistakes a truncated export for a complete one.
+        """
         import csv
         import io
         
+        self._audit_buffer.flush()
+        
+        filters = filters or {}
+        where_clause, params = self._build_audit_filters(
+            **{key: filters.get(key, "") for key in AUDIT_FILTER_KEYS}
+        )
+        
+        output = io.StringIO()
+        writer = csv.writer(output)
+        
+        # Write header
+        writer.writerow([
+            'ID', 'Timestamp', 'Username', 'Action Type', 'Resource', 
+            'Status', 'IP Address', 'Severity Level', 'Content Hash', 'Details'
+        ])
+        yield output.getvalue().encode('utf-8')
+        
+        conn = None
         try:
-            filters = filters or {}
-            logs, _ = self.get_audit_logs_filtered(
-                page=1, 
-                page_size=10000,  # Large limit for export
-                **filters
-            )
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.arraysize = AUDIT_EXPORT_BATCH_SIZE
+            cursor.execute(f"""
+                SELECT id, timestamp, username, action_type, resource, status,
+                       ip_address, severity_level, content_hash, {AUDIT_DETAILS_COLUMN}
+                FROM {AUDIT_DETAILS_JOIN}
+                WHERE {where_clause}
+                ORDER BY timestamp DESC
+            """, params)
             
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'ID', 'Timestamp', 'Username', 'Action Type', 'Resource', 
-                'Status', 'IP Address', 'Severity Level', 'Content Hash', 'Details'
-            ])
-            
-            # Write data
-            for log in logs:
-                writer.writerow([
-                    log['id'], log['timestamp'], log['username'], log['action_type'],
-                    log['resource'], log['status'], log['ip_address'], 
-                    log['severity_level'], log['content_hash'], log['details']
-                ])
-            
-            return output.getvalue()
+            # Write data one batch at a time
+            rows = cursor.fetchmany()
+            while rows:
+                output.seek(0)
+                output.truncate(0)
+                writer.writerows(rows)
+                yield output.getvalue().encode('utf-8')
+                rows = cursor.fetchmany()
             
         except Exception as error:
             logger.error(f"Error exporting audit logs: {error}")
-            return ""
+            raise
+        finally:
+            if conn is not None:
+                conn.close()
     
     def change_password(self, username: str, old_password: str, new_password: str, 
                        ip_address: str = "", session_id: str = "") -> bool:
@@ -736,6 +1093,25 @@ class DatabaseManager:
             logger.error(f"Error retrieving users: {error}")
             return []
     
+    def get_user_counts(self, locked_threshold: int = 5) -> Dict[str, int]:
+        """Count active users, admins and locked accounts in one aggregate query"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT COUNT(*) AS total,
+                           COALESCE(SUM(CASE WHEN role = 'admin' THEN 1 ELSE 0 END), 0) AS admins,
+                           COALESCE(SUM(CASE WHEN failed_login_attempts >= ? THEN 1 ELSE 0 END), 0) AS locked
+                    FROM users
+                    WHERE is_active = 1
+                """, (locked_threshold,))
+                row = cursor.fetchone()
+                return {'total': row['total'], 'admins': row['admins'], 'locked': row['locked']}
+                
+        except Exception as error:
+            logger.error(f"Error counting users: {error}")
+            return {'total': 0, 'admins': 0, 'locked': 0}
+    
     def delete_user(self, user_id: int, admin_username: str, ip_address: str = "") -> bool:
         """Delete a user (admin only)"""
         try:
@@ -932,7 +1308,6 @@ class DatabaseManager:
         try:
             # Generate default title if none provided
             if not title:
-                from datetime import datetime
                 title = f"Chat on {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             
             with self._get_connection() as conn:
@@ -1018,7 +1393,6 @@ class DatabaseManager:
                     # Parse sources if available
                     if row['sources']:
                         try:
-                            import json
                             message['sources'] = json.loads(row['sources'])
                         except:
                             message['sources'] = []
@@ -1036,10 +1410,23 @@ class DatabaseManager:
     def add_chat_message(self, session_id: int, user_id: int, role: str, content: str, 
                         sources: List[str] = None, token_count: int = None) -> bool:
         """Add a message to a chat session"""
+        return self.add_chat_messages(session_id, user_id, [(role, content, sources, token_count)])
+    
+    def add_chat_messages(self, session_id: int, user_id: int,
+                          messages: List[Tuple[str, str, Optional[List[str]], Optional[int]]]) -> bool:
+        """
+        Add messages to a chat session in one transaction
+        
+        Args:
+            session_id: Chat session ID
+            user_id: User ID (must own the session)
+            messages: (role, content, sources, token_count) tuples in conversation order
+        """
         try:
-            if role not in ['user', 'assistant']:
-                logger.error(f"Invalid role: {role}")
-                return False
+            for role, *_ in messages:
+                if role not in ['user', 'assistant']:
+                    logger.error(f"Invalid role: {role}")
+                    return False
             
             with self._get_connection() as conn:
                 cursor = conn.cursor()
@@ -1054,17 +1441,14 @@ class DatabaseManager:
                     logger.warning(f"User {user_id} attempted to add message to session {session_id} they don't own")
                     return False
                 
-                # Prepare sources
-                sources_json = None
-                if sources:
-                    import json
-                    sources_json = json.dumps(sources)
-                
-                # Add message
-                cursor.execute("""
+                # Add messages
+                cursor.executemany("""
                     INSERT INTO chat_messages (session_id, role, content, sources, token_count, created_at)
                     VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (session_id, role, content, sources_json, token_count))
+                """, [
+                    (session_id, role, content, json.dumps(sources) if sources else None, token_count)
+                    for role, content, sources, token_count in messages
+                ])
                 
                 # Update session updated_at and message count
                 cursor.execute("""
@@ -1080,7 +1464,7 @@ class DatabaseManager:
                 return True
                 
         except Exception as error:
-            logger.error(f"Error adding chat message: {error}")
+            logger.error(f"Error adding chat messages: {error}")
             return False
     
     def delete_chat_session(self, session_id: int, user_id: int) -> bool:
@@ -16,10 +16,7 @@ class ThemeManager:
         """Initialize theme settings in session state"""
         # Always use dark mode - no light mode support
         st.session_state.theme_mode = 'dark'
-        
-        if 'theme_initialized' not in st.session_state:
-            self.apply_theme()
-            st.session_state.theme_initialized = True
+        # The styles are emitted by apply_theme() at the start of every run
     
     def get_theme_colors(self) -> Dict[str, str]:
         """Get dark theme color palette with proper contrast"""
@@ -159,6 +156,11 @@ class ThemeManager:
             font-weight: 500;
         }}
         
+        .metric-grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+        }}
+        
         /* Status indicators with proper contrast */
         .status-online {{
             color: {colors['success']} !important;